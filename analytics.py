@@ -0,0 +1,480 @@
+import threading
+from bisect import bisect_left
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from indices import INACTIVE_STATUSES, SECONDS_PER_DAY, epoch_seconds
+
+STATUSES = ["Confirmada", "Pendiente", "Completada", "Cancelada", "No presentada"]
+STATUS_CODES = {estado: code for code, estado in enumerate(STATUSES)}
+INACTIVE_CODES = [STATUS_CODES[estado] for estado in INACTIVE_STATUSES]
+TABLE_STATUSES = ["Libre", "Ocupada", "Reservada"]
+OCCUPIED_CODE = TABLE_STATUSES.index("Ocupada")
+# Un turno más largo se toma por una mesa que no se liberó a tiempo en la
+# aplicación: cuenta en la ocupación, pero no en la duración típica
+MAX_TURN_SECONDS = 5 * 3600
+# Figuras que conserva FigureCache
+FIGURE_CACHE_SIZE = 64
+
+
+class AggregateCache:
+    # Cache de agregados del análisis. Cada entrada recuerda la versión del
+    # repositorio con la que se calculó y solo se recalcula cuando una
+    # escritura (crear, editar, borrar) ha incrementado esa versión.
+    # Los valores devueltos se comparten entre sesiones: no deben modificarse.
+
+    def __init__(self, store):
+        self._store = store
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, *args):
+        key = (name, *args)
+        version = self._store.version
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+
+        value = getattr(self._store, name)(*args)
+        with self._lock:
+            self.misses += 1
+            # Las entradas de versiones anteriores ya no pueden reutilizarse
+            self._entries = {k: e for k, e in self._entries.items() if e[0] >= version}
+            self._entries[key] = (version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class FigureCache:
+    # Cache LRU de gráficos ya construidos, compartida entre sesiones. La
+    # clave es el identificador del gráfico, la versión del repositorio y los
+    # parámetros que lo cambian (fecha, periodo...): mientras no haya
+    # escrituras, cambiar de pestaña o escribir en un formulario reutiliza la
+    # figura en lugar de volver a construirla. Se descartan primero las menos
+    # usadas. Las figuras devueltas se comparten: no deben modificarse.
+
+    def __init__(self, store, max_entries=FIGURE_CACHE_SIZE):
+        self._store = store
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, chart, build, *args):
+        # `build()` construye la figura si no está en la caché
+        key = (chart, self._store.version, *args)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry['figure']
+
+        figure = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = {'figure': figure, 'json_bytes': None}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def json_bytes(self, figure):
+        # Tamaño serializado de una figura de la caché, calculado una sola vez
+        with self._lock:
+            entry = next((e for e in self._entries.values() if e['figure'] is figure), None)
+            if entry is not None and entry['json_bytes'] is not None:
+                return entry['json_bytes']
+        size = len(figure.to_json().encode("utf-8"))
+        if entry is not None:
+            with self._lock:
+                entry['json_bytes'] = size
+        return size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+def day_number(day):
+    return epoch_seconds(pd.Timestamp(day).normalize()) // SECONDS_PER_DAY
+
+
+class DailyRollup:
+    # Agregados diarios precalculados: por día, hora y estado, el número de
+    # reservas y de comensales, y por día y mesa y por día y tamaño de grupo
+    # los de las reservas no canceladas ni no presentadas. Los días forman un
+    # eje contiguo (desde `first_day`) que crece con holgura hacia el pasado o
+    # el futuro, así que una ventana de N días es un corte de N filas:
+    # cualquier consulta cuesta O(días) y no depende del número de reservas.
+    # Se mantiene al crear, editar y borrar.
+
+    def __init__(self):
+        self.first_day = None
+        self.bookings = np.zeros((0, 24, len(STATUSES)), dtype=np.int32)
+        self.covers = np.zeros((0, 24, len(STATUSES)), dtype=np.int32)
+        self.table_bookings = np.zeros((0, 0), dtype=np.int32)
+        self.table_covers = np.zeros((0, 0), dtype=np.int32)
+        self.table_numbers = []
+        self._table_slots = {}
+        # Columna = número de comensales; crece con el grupo más grande visto
+        self.party_bookings = np.zeros((0, 1), dtype=np.int32)
+
+    @classmethod
+    def from_frame(cls, df):
+        rollup = cls()
+        codes = pd.Categorical(df['estado'], categories=STATUSES).codes
+        known = codes >= 0
+        if not known.any():
+            return rollup
+
+        seconds = df['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64)[known]
+        codes = codes[known]
+        comensales = df['comensales'].to_numpy(dtype=np.int64)[known]
+        days = seconds // SECONDS_PER_DAY
+        hours = (seconds % SECONDS_PER_DAY) // 3600
+
+        rollup._ensure_days(int(days.min()), int(days.max()))
+        offsets = days - rollup.first_day
+        np.add.at(rollup.bookings, (offsets, hours, codes), 1)
+        np.add.at(rollup.covers, (offsets, hours, codes), comensales)
+
+        mesa = df['mesa'].to_numpy(dtype=float, na_value=np.nan)[known]
+        seated = ~np.isnan(mesa) & ~np.isin(codes, INACTIVE_CODES)
+        numbers, slots = np.unique(mesa[seated].astype(np.int64), return_inverse=True)
+        rollup._ensure_tables(numbers.tolist())
+        slots = np.array([rollup._table_slots[n] for n in numbers.tolist()], dtype=np.int64)[slots]
+        np.add.at(rollup.table_bookings, (offsets[seated], slots), 1)
+        np.add.at(rollup.table_covers, (offsets[seated], slots), comensales[seated])
+
+        served = ~np.isin(codes, INACTIVE_CODES)
+        if served.any():
+            rollup._ensure_party_size(int(comensales[served].max()))
+            np.add.at(rollup.party_bookings, (offsets[served], comensales[served]), 1)
+        return rollup
+
+    def _ensure_days(self, lo, hi):
+        # Amplía el eje de días para cubrir [lo, hi] con holgura proporcional
+        if self.first_day is None:
+            start = end = lo
+        else:
+            start, end = self.first_day, self.first_day + len(self.bookings)
+        if lo >= start and hi < end and self.first_day is not None:
+            return
+        slack = max(len(self.bookings), 64)
+        new_start = start if lo >= start else lo - slack
+        new_end = end if hi < end else hi + 1 + slack
+        shift = start - new_start
+
+        def grow(array):
+            grown = np.zeros((new_end - new_start, *array.shape[1:]), dtype=array.dtype)
+            grown[shift:shift + len(array)] = array
+            return grown
+
+        self.bookings = grow(self.bookings)
+        self.covers = grow(self.covers)
+        self.table_bookings = grow(self.table_bookings)
+        self.table_covers = grow(self.table_covers)
+        self.party_bookings = grow(self.party_bookings)
+        self.first_day = new_start
+
+    def _ensure_tables(self, numbers):
+        new = [numero for numero in numbers if numero not in self._table_slots]
+        if not new:
+            return
+        for numero in new:
+            self._table_slots[numero] = len(self.table_numbers)
+            self.table_numbers.append(numero)
+        padding = ((0, 0), (0, len(new)))
+        self.table_bookings = np.pad(self.table_bookings, padding)
+        self.table_covers = np.pad(self.table_covers, padding)
+
+    def _ensure_party_size(self, comensales):
+        if comensales >= self.party_bookings.shape[1]:
+            self.party_bookings = np.pad(self.party_bookings, ((0, 0), (0, comensales + 1 - self.party_bookings.shape[1])))
+
+    def _apply(self, reservation, sign):
+        estado = reservation['estado']
+        if estado not in STATUS_CODES:
+            return
+        seconds = epoch_seconds(reservation['fecha'])
+        day, hour = seconds // SECONDS_PER_DAY, (seconds % SECONDS_PER_DAY) // 3600
+        self._ensure_days(day, day)
+        offset, code = day - self.first_day, STATUS_CODES[estado]
+
+        self.bookings[offset, hour, code] += sign
+        self.covers[offset, hour, code] += sign * int(reservation['comensales'])
+        mesa = reservation['mesa']
+        if pd.notna(mesa) and estado not in INACTIVE_STATUSES:
+            self._ensure_tables([int(mesa)])
+            slot = self._table_slots[int(mesa)]
+            self.table_bookings[offset, slot] += sign
+            self.table_covers[offset, slot] += sign * int(reservation['comensales'])
+        if estado not in INACTIVE_STATUSES:
+            self._ensure_party_size(int(reservation['comensales']))
+            self.party_bookings[offset, int(reservation['comensales'])] += sign
+
+    def add(self, reservation):
+        self._apply(reservation, 1)
+
+    def remove(self, reservation):
+        self._apply(reservation, -1)
+
+    def _window(self, array, start_day, end_day):
+        # Filas de los días [start_day, end_day); ceros fuera del eje
+        window = np.zeros((max(end_day - start_day, 0), *array.shape[1:]), dtype=np.int64)
+        if self.first_day is None:
+            return window
+        lo = max(start_day, self.first_day)
+        hi = min(end_day, self.first_day + len(array))
+        if lo < hi:
+            window[lo - start_day:hi - start_day] = array[lo - self.first_day:hi - self.first_day]
+        return window
+
+    def status_totals(self):
+        # Reservas y comensales de todo el histórico por estado
+        return pd.DataFrame({
+            'reservas': self.bookings.sum(axis=(0, 1), dtype=np.int64),
+            'comensales': self.covers.sum(axis=(0, 1), dtype=np.int64)
+        }, index=pd.Index(STATUSES, name='estado'))
+
+    def hourly_bookings(self, day):
+        day = day_number(day)
+        return self._window(self.bookings, day, day + 1)[0].sum(axis=1)
+
+    def daily_totals(self, start, end):
+        # Una fila por día de [start, end): reservas y comensales sin contar
+        # las canceladas ni las no presentadas, cancelaciones y no presentadas
+        start_day, end_day = day_number(start), day_number(end)
+        bookings = self._window(self.bookings, start_day, end_day).sum(axis=1)
+        covers = self._window(self.covers, start_day, end_day).sum(axis=1)
+        active = ~np.isin(np.arange(len(STATUSES)), INACTIVE_CODES)
+        return pd.DataFrame({
+            'reservas': bookings[:, active].sum(axis=1),
+            'comensales': covers[:, active].sum(axis=1),
+            'cancelaciones': bookings[:, STATUS_CODES["Cancelada"]],
+            'no_presentadas': bookings[:, STATUS_CODES["No presentada"]],
+        }, index=pd.date_range(pd.Timestamp(start).normalize(), periods=end_day - start_day, freq='D', name='dia'))
+
+    def weekday_hour_covers(self, start, end):
+        # Comensales servidos de la ventana por día de la semana y hora (0 = lunes)
+        start_day, end_day = day_number(start), day_number(end)
+        covers = self._window(self.covers, start_day, end_day)
+        covers = np.delete(covers, INACTIVE_CODES, axis=2).sum(axis=2)
+        by_weekday = np.zeros((7, 24), dtype=np.int64)
+        np.add.at(by_weekday, (np.arange(start_day, end_day) + 3) % 7, covers)
+        weekdays, hours = np.nonzero(by_weekday)
+        return pd.DataFrame({
+            'dia_semana': weekdays,
+            'hora': hours,
+            'comensales': by_weekday[weekdays, hours]
+        })
+
+    def hourly_matrix(self, start, end):
+        # Matrices día × hora de [start, end): comensales y reservas no
+        # canceladas ni no presentadas, y cancelaciones
+        start_day, end_day = day_number(start), day_number(end)
+        covers = self._window(self.covers, start_day, end_day)
+        bookings = self._window(self.bookings, start_day, end_day)
+        return (np.delete(covers, INACTIVE_CODES, axis=2).sum(axis=2),
+                np.delete(bookings, INACTIVE_CODES, axis=2).sum(axis=2),
+                bookings[:, :, STATUS_CODES["Cancelada"]])
+
+    def table_totals(self, start, end):
+        start_day, end_day = day_number(start), day_number(end)
+        return pd.DataFrame({
+            'reservas': self._window(self.table_bookings, start_day, end_day).sum(axis=0),
+            'comensales': self._window(self.table_covers, start_day, end_day).sum(axis=0),
+        }, index=pd.Index(self.table_numbers, name='mesa', dtype='int64')).sort_index()
+
+    def party_size_distribution(self, start, end):
+        # Reservas no canceladas ni no presentadas de [start, end) por número de comensales
+        counts = self._window(self.party_bookings, day_number(start), day_number(end)).sum(axis=0)
+        sizes = np.flatnonzero(counts)
+        return pd.Series(counts[sizes], index=pd.Index(sizes, name='comensales'), dtype='int64')
+
+
+class TableEventLog:
+    # Registro de solo anexado de los cambios de estado de las mesas, por
+    # columnas: arrays de numpy con la mesa, el código de estado, el momento
+    # (segundos) y los comensales sentados (-1 si no se conocen), que doblan
+    # su tamaño al llenarse. Los turnos son los tramos de cada mesa en
+    # "Ocupada" y salen de una vez ordenando por mesa y momento; la ocupación
+    # por minuto es la suma acumulada de las entradas y salidas de cada turno.
+    # Para estimar esperas lleva además, por tamaño de grupo, la suma y el
+    # número de turnos cerrados, que se actualizan al anexar sin recorrer el
+    # registro, y por mesa la lista ordenada de inicios de turno.
+
+    def __init__(self):
+        self._numero = np.zeros(0, dtype=np.int32)
+        self._estado = np.zeros(0, dtype=np.int8)
+        self._momento = np.zeros(0, dtype=np.int64)
+        self._comensales = np.zeros(0, dtype=np.int16)
+        self._size = 0
+        self._open = {}
+        self._starts = {}
+        self._turn_totals = {}
+
+    @classmethod
+    def from_rows(cls, rows):
+        # Filas (mesa, estado, momento, comensales) leídas de la base
+        log = cls()
+        if not rows:
+            return log
+
+        numero, estado, momento, comensales = zip(*rows)
+        log._numero = np.array(numero, dtype=np.int32)
+        log._estado = pd.Categorical(estado, categories=TABLE_STATUSES).codes.astype(np.int8)
+        log._momento = np.array(momento, dtype=np.int64)
+        log._comensales = np.array([-1 if c is None else c for c in comensales], dtype=np.int16)
+        log._size = len(rows)
+
+        numero, start, end, comensales = log._turns()
+        # Los turnos salen ordenados por mesa y momento
+        tables, first = np.unique(numero, return_index=True)
+        log._starts = dict(zip(tables.tolist(), (part.tolist() for part in np.split(start, first[1:]))))
+        still_open = end < 0
+        log._open = dict(zip(numero[still_open].tolist(), zip(start[still_open].tolist(),
+                                                               comensales[still_open].tolist())))
+        durations = end - start
+        counted = ~still_open & (comensales > 0) & (durations > 0) & (durations <= MAX_TURN_SECONDS)
+        sizes = comensales[counted].astype(np.int64)
+        seconds = np.bincount(sizes, weights=durations[counted])
+        turns = np.bincount(sizes)
+        log._turn_totals = {size: (float(seconds[size]), int(turns[size])) for size in np.flatnonzero(turns).tolist()}
+        return log
+
+    def __len__(self):
+        return self._size
+
+    def append(self, numero, estado, momento, comensales=None):
+        if self._size == len(self._momento):
+            capacity = max(64, 2 * self._size)
+            for name in ('_numero', '_estado', '_momento', '_comensales'):
+                array = getattr(self, name)
+                grown = np.zeros(capacity, dtype=array.dtype)
+                grown[:self._size] = array[:self._size]
+                setattr(self, name, grown)
+
+        numero, momento, comensales = int(numero), int(momento), -1 if comensales is None else int(comensales)
+        code = TABLE_STATUSES.index(estado)
+        i = self._size
+        self._numero[i], self._estado[i], self._momento[i], self._comensales[i] = numero, code, momento, comensales
+        self._size += 1
+
+        # Los estados llegan en orden: una salida de "Ocupada" cierra el turno en curso
+        if code == OCCUPIED_CODE:
+            if numero not in self._open:
+                self._open[numero] = (momento, comensales)
+                self._starts.setdefault(numero, []).append(momento)
+            return
+        opened = self._open.pop(numero, None)
+        if opened is not None and opened[1] > 0 and 0 < momento - opened[0] <= MAX_TURN_SECONDS:
+            seconds, turns = self._turn_totals.get(opened[1], (0.0, 0))
+            self._turn_totals[opened[1]] = (seconds + momento - opened[0], turns + 1)
+
+    def open_turn(self, numero):
+        # Inicio (segundos) del turno en curso de la mesa; None si no está ocupada
+        opened = self._open.get(int(numero))
+        return None if opened is None else opened[0]
+
+    def open_turn_size(self, numero):
+        # Comensales del turno en curso de la mesa; None si no está ocupada o no se conocen
+        opened = self._open.get(int(numero))
+        return None if opened is None or opened[1] < 0 else opened[1]
+
+    def first_turn_start(self, numero, start, end):
+        # Primer inicio de turno de la mesa en [start, end] (segundos); None si no hay
+        starts = self._starts.get(int(numero), [])
+        i = bisect_left(starts, int(start))
+        return starts[i] if i < len(starts) and starts[i] <= int(end) else None
+
+    def turn_seconds_by_size(self):
+        # Duración media de los turnos cerrados por tamaño de grupo
+        return {size: seconds / turns for size, (seconds, turns) in self._turn_totals.items()}
+
+    def _turns(self):
+        # Tramos en "Ocupada" como arrays (mesa, inicio, fin, comensales); fin
+        # es -1 si la mesa sigue ocupada. Se ordena por mesa y momento y se
+        # quedan solo las filas en las que la mesa entra o sale de "Ocupada":
+        # así cada tramo ocupado termina en la fila siguiente de la misma mesa.
+        size = self._size
+        order = np.lexsort((np.arange(size), self._momento[:size], self._numero[:size]))
+        numero = self._numero[:size][order]
+        occupied = self._estado[:size][order] == OCCUPIED_CODE
+        momento = self._momento[:size][order]
+        comensales = self._comensales[:size][order]
+
+        new_table = np.r_[True, numero[1:] != numero[:-1]]
+        keep = new_table | np.r_[True, occupied[1:] != occupied[:-1]]
+        numero, occupied, momento, comensales, new_table = (
+            array[keep] for array in (numero, occupied, momento, comensales, new_table)
+        )
+        closed = np.r_[~new_table[1:], False]
+        end = np.where(closed, np.r_[momento[1:], -1], -1)
+        return numero[occupied], momento[occupied], end[occupied], comensales[occupied]
+
+    @staticmethod
+    def _overlapping(turns, start, end, now):
+        # Turnos que se solapan con [start, end), recortados a la ventana
+        numero, turn_start, turn_end, comensales = turns
+        turn_end = np.where(turn_end < 0, max(now, start), turn_end)
+        overlaps = (turn_start < end) & (turn_end > start)
+        return (numero[overlaps], np.maximum(turn_start[overlaps], start), np.minimum(turn_end[overlaps], end),
+                comensales[overlaps])
+
+    def turn_times(self, start, end):
+        # Por mesa, turnos cerrados que empiezan en [start, end) y su duración en minutos
+        start, end = epoch_seconds(start), epoch_seconds(end)
+        numero, turn_start, turn_end, _ = self._turns()
+        minutes = (turn_end - turn_start) / 60
+        selected = (turn_end >= 0) & (turn_start >= start) & (turn_start < end) & (minutes <= MAX_TURN_SECONDS / 60)
+        turns = pd.DataFrame({'mesa': numero[selected].astype(np.int64), 'minutos': minutes[selected]})
+        return turns.groupby('mesa')['minutos'].agg(turnos='count', duracion_media='mean',
+                                                     duracion_mediana='median')
+
+    def occupancy_series(self, start, end, now, capacities):
+        # Mesas y plazas ocupadas al empezar cada minuto de [start, end). Cada
+        # turno suma uno en su primer minuto y resta uno en el siguiente al
+        # último; la suma acumulada da la ocupación sin recorrer los minutos.
+        start, end, now = epoch_seconds(start), epoch_seconds(end), int(now)
+        minutes = max((end - start) // 60, 0)
+        numero, turn_start, turn_end, _ = self._overlapping(self._turns(), start, end, now)
+        first = -(-(turn_start - start) // 60)
+        last = -(-(turn_end - start) // 60)
+        seats = pd.Series(capacities).reindex(numero).fillna(0).to_numpy()
+
+        tables = np.zeros(minutes + 1, dtype=np.int64)
+        covers = np.zeros(minutes + 1, dtype=np.float64)
+        np.add.at(tables, first, 1)
+        np.add.at(tables, last, -1)
+        np.add.at(covers, first, seats)
+        np.add.at(covers, last, -seats)
+        return pd.DataFrame({
+            'mesas_ocupadas': np.cumsum(tables)[:minutes],
+            'plazas_ocupadas': np.cumsum(covers)[:minutes].astype(np.int64),
+        }, index=pd.date_range(pd.Timestamp(start, unit='s'), periods=minutes, freq='min', name='minuto'))
+
+    def seat_hours(self, start, end, now, capacities):
+        # Turnos empezados en [start, end) y horas de mesa y de plaza ocupadas
+        # en la ventana (los turnos abiertos cuentan hasta `now`)
+        start, end, now = epoch_seconds(start), epoch_seconds(end), int(now)
+        turns = self._turns()
+        numero, turn_start, turn_end, _ = self._overlapping(turns, start, end, now)
+        hours = (turn_end - turn_start) / 3600
+        seats = pd.Series(capacities).reindex(numero).fillna(0).to_numpy()
+        return {
+            'turnos': int(((turns[1] >= start) & (turns[1] < end)).sum()),
+            'horas_mesa': float(hours.sum()),
+            'horas_plaza': float((hours * seats).sum()),
+        }
@@ -0,0 +1,388 @@
+import argparse
+import json
+import math
+import multiprocessing
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.testing.v1 import AppTest
+
+import storage
+from analytics import AggregateCache
+from scheduler import sweep_due
+from seating import plan_seating
+from storage import ReservationStore
+from synthetic import generate_example_data, generate_table_events
+from views.common import get_scheduler
+
+# Banco de pruebas de rendimiento. Genera datos sintéticos con el mismo
+# generador que la siembra de la aplicación, mide cada página con AppTest
+# (sin navegador) y cada operación del repositorio por separado, y escribe
+# los resultados en JSON para compararlos entre versiones:
+#
+#     python benchmark.py --sizes 10000 100000 1000000 --output bench.json
+#
+# Con --load-test simula en su lugar varias sesiones de encargados de sala
+# trabajando a la vez sobre la misma base para dimensionar el servidor. AppTest
+# no admite varias sesiones en un mismo proceso, así que cada sesión corre en
+# su propio proceso con su propia copia del repositorio en memoria: se miden
+# las páginas y la contención de escritura en SQLite, no el reparto de un
+# único proceso entre sesiones:
+#
+#     python benchmark.py --sizes 1000000 --load-test --sessions 50 --duration 120
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+PAGES = ["Panel Principal", "Reservas", "Gestión de Mesas", "Análisis"]
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+
+def summarize(samples):
+    # Tiempos en milisegundos
+    samples = [sample * 1000 for sample in samples]
+    return {
+        'runs': len(samples),
+        'min_ms': round(min(samples), 3),
+        'median_ms': round(statistics.median(samples), 3),
+        'mean_ms': round(statistics.fmean(samples), 3),
+        'p95_ms': round(statistics.quantiles(samples, n=20)[18] if len(samples) > 1 else samples[0], 3),
+        'max_ms': round(max(samples), 3),
+    }
+
+
+def measure(operation, repeat):
+    # `operation(i)` recibe el número de repetición para no repetir efectos
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples)
+
+
+def build_database(path, size, seed, tables, per_day):
+    days = max(7, math.ceil(size / per_day))
+    reservations, tables_df = generate_example_data(size, tables, days, seed)
+    store = ReservationStore(path, example_data=False)
+    store.bulk_insert_tables(tables_df)
+    store.bulk_insert_reservations(reservations)
+    store.bulk_insert_table_events(generate_table_events(reservations, seed))
+    # Se barre el histórico aquí, fuera de las medidas
+    sweep_due(store, pd.Timestamp(datetime.now()))
+
+
+def benchmark_operations(path, repeat, seed):
+    results = {}
+    rng = np.random.RandomState(seed)
+
+    start = time.perf_counter()
+    store = ReservationStore(path, example_data=False)
+    results['load'] = summarize([time.perf_counter() - start])
+
+    today = datetime.now().date()
+    day_start = datetime.combine(today, datetime.min.time())
+    ids = store.live_reservations()['id'].to_numpy()
+    tables = store.tables()
+
+    results['filter_day'] = measure(lambda i: store.reservations_for_day(today + timedelta(days=i % 7)), repeat)
+    results['filter_week'] = measure(lambda i: store.reservations_between(day_start, day_start + timedelta(days=7)),
+                                     repeat)
+
+    created = []
+
+    def create(i):
+        created.append(store.add_reservation({
+            'nombre': "Benchmark", 'telefono': f"+34 600 000 {i:03d}", 'fecha': day_start + timedelta(hours=13),
+            'comensales': 2, 'mesa': None, 'estado': "Pendiente", 'notas': ""
+        }))
+
+    results['create'] = measure(create, repeat)
+
+    edit_ids = rng.choice(ids, size=repeat, replace=False)
+    results['edit'] = measure(
+        lambda i: store.update_reservation(edit_ids[i], {'comensales': int(rng.randint(1, 9)), 'notas': f"nota {i}"}),
+        repeat
+    )
+    results['delete'] = measure(lambda i: store.delete_reservation(created[i]), repeat)
+
+    results['search_name'] = measure(lambda i: store.search("garcía", limit=50), repeat)
+    results['search_phone'] = measure(lambda i: store.search("600", limit=50), repeat)
+
+    results['available_tables'] = measure(lambda i: store.available_tables(day_start + timedelta(hours=20)), repeat)
+    daily = store.reservations_for_day(today)
+    results['plan_seating'] = measure(lambda i: plan_seating(daily, tables), repeat)
+
+    # Agregados sin caché (llamada directa al repositorio) y a través de AggregateCache
+    for days in (7, 30, 365):
+        window_start = day_start - timedelta(days=days - 1)
+        results[f'analytics_window_{days}d'] = measure(
+            lambda i: (store.daily_totals(window_start, day_start + timedelta(days=1)),
+                       store.window_weekday_hour_covers(window_start, day_start + timedelta(days=1)),
+                       store.table_totals(window_start, day_start + timedelta(days=1))),
+            repeat
+        )
+    results['analytics_party_size'] = measure(
+        lambda i: store.party_size_distribution(day_start - timedelta(days=30), day_start + timedelta(days=1)), repeat
+    )
+    history_start = day_start - timedelta(days=364)
+    results['analytics_weekday_hour'] = measure(
+        lambda i: store.window_weekday_hour_covers(history_start, day_start + timedelta(days=1)), repeat
+    )
+    results['analytics_status_counts'] = measure(lambda i: store.status_counts(), repeat)
+    results['analytics_hourly'] = measure(lambda i: store.hourly_bookings(today), repeat)
+    aggregates = AggregateCache(store)
+    results['analytics_cached'] = measure(
+        lambda i: aggregates.get('window_weekday_hour_covers', history_start, day_start + timedelta(days=1)), repeat
+    )
+    return results
+
+
+def use_database(path):
+    # La aplicación crea el repositorio con la ruta de storage.DB_PATH; se
+    # vacía la caché de recursos (lo que para los hilos de la base anterior)
+    # para que abra esta base. La base ya está barrida y el barrido en vivo
+    # se para para que no escriba en ella mientras se mide
+    storage.DB_PATH = path
+    st.cache_resource.clear()
+    get_scheduler().stop()
+
+
+def release_database():
+    # Para los hilos de fondo antes de borrar la base
+    st.cache_resource.clear()
+
+
+def benchmark_pages(path, repeat, timeout):
+    use_database(path)
+
+    results = {}
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    start = time.perf_counter()
+    app.run()
+    results['cold_start'] = summarize([time.perf_counter() - start])
+
+    for page in PAGES:
+        samples = []
+        for _ in range(repeat):
+            app.sidebar.radio[0].set_value(page)
+            start = time.perf_counter()
+            app.run()
+            samples.append(time.perf_counter() - start)
+            if app.exception:
+                raise RuntimeError(f"{page}: {app.exception[0].message}")
+        results[page] = summarize(samples)
+    release_database()
+    return results
+
+
+def open_page(app, page):
+    if app.sidebar.radio[0].value != page:
+        app.sidebar.radio[0].set_value(page).run()
+
+
+def widget(widgets, label):
+    return next(w for w in widgets if w.label == label)
+
+
+def create_reservation(app, rng):
+    open_page(app, "Reservas")
+    widget(app.text_input, "Nombre del cliente").set_value(f"Carga {rng.randint(1, 10**6)}")
+    widget(app.text_input, "Teléfono").set_value(f"+34 6{rng.randint(10**7, 10**8 - 1)}")
+    widget(app.button, "Crear Reserva").click().run()
+
+
+def search_reservations(app, rng):
+    open_page(app, "Reservas")
+    widget(app.text_input, "Buscar por nombre o teléfono").set_value(rng.choice(["garcía", "lópez", "600", "ruiz"])).run()
+
+
+def update_table_status(app, rng):
+    open_page(app, "Gestión de Mesas")
+    widget(app.selectbox, "Cambiar estado").set_value(rng.choice(["Libre", "Ocupada", "Reservada"]))
+    widget(app.button, "Actualizar Estado").click().run()
+
+
+# Acciones de un encargado de sala simulado y su peso relativo
+LOAD_ACTIONS = {
+    'panel': (lambda app, rng: app.sidebar.radio[0].set_value("Panel Principal").run(), 4),
+    'ver_reservas': (lambda app, rng: app.sidebar.radio[0].set_value("Reservas").run(), 3),
+    'crear_reserva': (create_reservation, 2),
+    'buscar': (search_reservations, 2),
+    'estado_mesa': (update_table_status, 2),
+    'analisis': (lambda app, rng: app.sidebar.radio[0].set_value("Análisis").run(), 1),
+}
+
+
+def host_session(session, deadline, think_time, timeout, samples, errors):
+    # Una sesión del navegador: acciones al azar según su peso, separadas por
+    # una pausa exponencial de media `think_time` segundos
+    rng = random.Random(session)
+    names = list(LOAD_ACTIONS)
+    weights = [LOAD_ACTIONS[name][1] for name in names]
+    app = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    start = time.perf_counter()
+    app.run()
+    samples['abrir_sesion'].append(time.perf_counter() - start)
+
+    while time.perf_counter() < deadline:
+        name = rng.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            LOAD_ACTIONS[name][0](app, rng)
+        except Exception as error:
+            errors.append(f"{name}: {error!r}")
+        else:
+            samples[name].append(time.perf_counter() - start)
+            if app.exception:
+                errors.append(f"{name}: {app.exception[0].message}")
+        if think_time:
+            time.sleep(rng.expovariate(1 / think_time))
+
+
+def session_process(path, session, duration, think_time, timeout, ready, results):
+    # Proceso de una sesión: abre la base y carga el repositorio fuera de la
+    # medida, espera a que todas las sesiones estén listas y devuelve sus
+    # tiempos por la cola
+    samples = {name: [] for name in ['abrir_sesion', *LOAD_ACTIONS]}
+    errors = []
+    elapsed = 0.0
+    try:
+        use_database(path)
+        AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+        ready.wait()
+        start = time.perf_counter()
+        host_session(session, start + duration, think_time, timeout, samples, errors)
+        elapsed = time.perf_counter() - start
+        release_database()
+    except Exception as error:
+        # Rompe la barrera para que ni el resto de sesiones ni el principal la esperen
+        ready.abort()
+        errors.append(f"proceso: {error!r}")
+    results.put((session, samples, errors, elapsed))
+
+
+def load_test(path, sessions, duration, think_time, timeout):
+    context = multiprocessing.get_context("spawn")
+    ready = context.Barrier(sessions + 1)
+    results = context.Queue()
+    processes = [
+        context.Process(target=session_process, args=(path, session, duration, think_time, timeout, ready, results),
+                        name=f"sesion-{session}", daemon=True)
+        for session in range(sessions)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        ready.wait()
+    except threading.BrokenBarrierError:
+        # Alguna sesión no pudo arrancar; su error llega por la cola
+        pass
+    start = time.perf_counter()
+    # Se vacía la cola antes de esperar a los procesos para que no se bloqueen al escribir
+    finished = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - start
+
+    samples = {name: [] for name in ['abrir_sesion', *LOAD_ACTIONS]}
+    errors, by_session = [], []
+    for session, session_samples, session_errors, session_elapsed in sorted(finished, key=lambda item: item[0]):
+        for name, times in session_samples.items():
+            samples[name].extend(times)
+        errors.extend(f"sesión {session}: {error}" for error in session_errors)
+        session_actions = sum(len(session_samples[name]) for name in LOAD_ACTIONS)
+        by_session.append({
+            'session': session,
+            'duration_s': round(session_elapsed, 3),
+            'actions': session_actions,
+            'actions_per_s': round(session_actions / session_elapsed, 3) if session_elapsed else 0,
+            'errors': len(session_errors),
+        })
+
+    actions = sum(len(samples[name]) for name in LOAD_ACTIONS)
+    return {
+        'sessions': sessions,
+        'duration_s': round(elapsed, 3),
+        'think_time_s': think_time,
+        'actions': actions,
+        'actions_per_s': round(actions / elapsed, 3),
+        'errors': len(errors),
+        'first_errors': errors[:10],
+        'by_action': {name: summarize(times) for name, times in samples.items() if times},
+        'by_session': by_session,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark de páginas y operaciones de datos")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="número de reservas")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="repeticiones por medida")
+    parser.add_argument("--tables", type=int, default=15, help="número de mesas")
+    parser.add_argument("--per-day", type=int, default=100, help="reservas por día en el histórico")
+    parser.add_argument("--timeout", type=float, default=600, help="segundos máximos por ejecución de página")
+    parser.add_argument("--skip-pages", action="store_true", help="medir solo las operaciones de datos")
+    parser.add_argument("--load-test", action="store_true",
+                        help="en lugar de las medidas anteriores, simular sesiones concurrentes")
+    parser.add_argument("--sessions", type=int, default=20, help="sesiones simultáneas de la prueba de carga")
+    parser.add_argument("--duration", type=float, default=60, help="segundos de la prueba de carga")
+    parser.add_argument("--think-time", type=float, default=2.0,
+                        help="pausa media en segundos entre acciones de una sesión (0 = sin pausa)")
+    parser.add_argument("--output", help="fichero JSON de salida (por defecto, la salida estándar)")
+    args = parser.parse_args(argv)
+
+    report = {
+        'meta': {
+            'timestamp': datetime.now().isoformat(timespec="seconds"),
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'streamlit': st.__version__,
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'tables': args.tables,
+            'per_day': args.per_day,
+            'mode': "load_test" if args.load_test else "benchmark",
+        },
+        'results': [],
+    }
+
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "benchmark.db")
+            start = time.perf_counter()
+            build_database(path, size, args.seed, args.tables, args.per_day)
+            entry = {'size': size, 'setup_s': round(time.perf_counter() - start, 3)}
+            print(f"{size} reservas: datos generados en {entry['setup_s']} s", file=sys.stderr)
+
+            if args.load_test:
+                entry['load_test'] = load_test(path, args.sessions, args.duration, args.think_time, args.timeout)
+                print(f"{size} reservas: {entry['load_test']['actions_per_s']} acciones/s con "
+                      f"{args.sessions} sesiones", file=sys.stderr)
+                report['results'].append(entry)
+                continue
+
+            entry['operations'] = benchmark_operations(path, args.repeat, args.seed)
+            if not args.skip_pages:
+                entry['pages'] = benchmark_pages(path, args.repeat, args.timeout)
+            report['results'].append(entry)
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+FORECAST_DAYS = 14
+# Historia usada para ajustar el modelo: 52 semanas completas
+HISTORY_DAYS = 364
+# Peso de una semana pasada: la mitad cada HALF_LIFE_WEEKS semanas
+HALF_LIFE_WEEKS = 8
+# Reservas ficticias con la tasa global que suavizan las tasas de cancelación
+# de las franjas con poca historia
+CANCELLATION_PRIOR = 10
+FORECAST_REFRESH_SECONDS = 15 * 60
+# Comensales por hora que atiende una persona de sala
+COVERS_PER_STAFF = 12
+MIN_STAFF = 1
+SERVICE_HOURS = list(range(12, 16)) + list(range(19, 23))
+
+logger = logging.getLogger("restaurante.previsiones")
+
+
+def fit_seasonal_model(covers, bookings, cancelled, first_weekday):
+    # Modelo estacional día de la semana × hora sobre matrices día × hora
+    # (la fila 0 es el día más antiguo). El peso de cada semana se reduce a
+    # la mitad cada HALF_LIFE_WEEKS semanas de antigüedad. Los días anteriores
+    # a la primera reserva registrada no pesan: un local con poco historial no
+    # ve su media diluida por días vacíos. Devuelve los comensales esperados y
+    # la tasa de cancelación por día de la semana (0 = lunes) y hora.
+    days = len(covers)
+    age_weeks = (days - 1 - np.arange(days)) // 7
+    weights = 0.5 ** (age_weeks / HALF_LIFE_WEEKS)
+    recorded = np.flatnonzero(bookings.sum(axis=1) + cancelled.sum(axis=1))
+    weights[:recorded[0] if len(recorded) else days] = 0
+    weekdays = (first_weekday + np.arange(days)) % 7
+
+    def weighted_sum(matrix):
+        totals = np.zeros((7, 24))
+        np.add.at(totals, weekdays, matrix * weights[:, None])
+        return totals
+
+    weight_totals = np.bincount(weekdays, weights, minlength=7)[:, None]
+    expected_covers = np.divide(weighted_sum(covers), weight_totals,
+                                out=np.zeros((7, 24)), where=weight_totals > 0)
+
+    kept, lost = weighted_sum(bookings), weighted_sum(cancelled)
+    all_bookings = bookings.sum() + cancelled.sum()
+    global_rate = cancelled.sum() / all_bookings if all_bookings else 0.0
+    cancellation_rate = (lost + CANCELLATION_PRIOR * global_rate) / (kept + lost + CANCELLATION_PRIOR)
+    return expected_covers, cancellation_rate
+
+
+def build_forecast(store, today, days=FORECAST_DAYS):
+    # Previsión por día y hora de servicio para [today, today + days). Las
+    # reservas ya anotadas (descontada la cancelación esperada) son un
+    # mínimo: la previsión nunca queda por debajo de lo ya reservado.
+    today = datetime.combine(today, datetime.min.time())
+    history_start = today - timedelta(days=HISTORY_DAYS)
+    covers, bookings, cancelled = store.hourly_history(history_start, today)
+    expected_covers, cancellation_rate = fit_seasonal_model(covers, bookings, cancelled, history_start.weekday())
+
+    booked_covers, _, _ = store.hourly_history(today, today + timedelta(days=days))
+    dates = pd.date_range(today, periods=days, freq='D')
+    weekdays = dates.weekday.to_numpy()
+
+    hours = np.array(SERVICE_HOURS)
+    seasonal = expected_covers[weekdays][:, hours]
+    rates = cancellation_rate[weekdays][:, hours]
+    booked = booked_covers[:, hours]
+    predicted = np.maximum(seasonal, booked * (1 - rates))
+    staff = np.maximum(np.ceil(predicted / COVERS_PER_STAFF), MIN_STAFF).astype(int)
+
+    return pd.DataFrame({
+        'fecha': np.repeat(dates.date, len(hours)),
+        'hora': np.tile(hours, days),
+        'comensales_previstos': predicted.ravel().round(1),
+        'reservados': booked.ravel(),
+        'tasa_cancelacion': rates.ravel().round(3),
+        'personal': staff.ravel(),
+    })
+
+
+class ForecastService:
+    # Calcula la previsión en un hilo propio y la guarda ya hecha: las páginas
+    # solo leen la última disponible (get nunca espera al ajuste del modelo).
+    # Se recalcula cada `refresh_seconds` o antes si se pide con request_refresh.
+
+    def __init__(self, store, refresh_seconds=FORECAST_REFRESH_SECONDS):
+        self._store = store
+        self.refresh_seconds = refresh_seconds
+        self.computed_at = None
+        self.computed_version = None
+        self.last_error = None
+        self._forecast = None
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="previsiones", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.refresh()
+            except Exception as error:
+                self.last_error = error
+                logger.exception("Error al calcular la previsión")
+            self._wake.wait(self.refresh_seconds)
+            self._wake.clear()
+
+    def refresh(self):
+        version = self._store.version
+        forecast = build_forecast(self._store, datetime.now().date())
+        self._forecast = forecast
+        self.computed_at = datetime.now()
+        self.computed_version = version
+        self.last_error = None
+
+    def request_refresh(self):
+        self._wake.set()
+
+    def stop(self):
+        # Termina el hilo tras el cálculo en curso
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def get(self):
+        return self._forecast
+
+
+def staff_summary(forecast):
+    # Personal máximo por día y comensales previstos del día
+    return forecast.groupby('fecha').agg(
+        comensales_previstos=('comensales_previstos', 'sum'),
+        reservados=('reservados', 'sum'),
+        personal_max=('personal', 'max'),
+    ).round(1)
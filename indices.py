@@ -0,0 +1,383 @@
+import heapq
+import unicodedata
+from bisect import bisect_left, bisect_right, insort
+from itertools import chain, islice
+
+import numpy as np
+import pandas as pd
+
+SECONDS_PER_DAY = 86400
+# Estados de reserva que no ocupan mesa ni cuentan como comensales servidos
+INACTIVE_STATUSES = ["Cancelada", "No presentada"]
+# Por encima de estas listas por rango, una página de búsqueda se selecciona en lugar de mezclarse
+MERGE_MAX_LISTS = 64
+
+
+def epoch_seconds(value):
+    return int(pd.Timestamp(value).timestamp())
+
+
+class DayIndex:
+    # Índice de reservas particionado por día. Cada día guarda sus reservas
+    # ordenadas por hora como pares (segundos, id); la lista de días se mantiene
+    # ordenada para resolver rangos con búsqueda binaria. Sirve el corte diario
+    # en O(log n) sin recorrer ni copiar el histórico completo.
+
+    def __init__(self):
+        self._days = []
+        self._entries = {}
+
+    @classmethod
+    def from_frame(cls, df):
+        index = cls()
+        if df.empty:
+            return index
+
+        seconds = df['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        ids = df['id'].to_numpy(dtype=np.int64)
+        order = np.lexsort((ids, seconds))
+        seconds, ids = seconds[order], ids[order]
+        days = seconds // SECONDS_PER_DAY
+
+        # Cortes entre días consecutivos sobre los arrays ya ordenados
+        boundaries = np.flatnonzero(np.diff(days)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(days)]))
+        for start, end in zip(starts, ends):
+            index._entries[int(days[start])] = list(zip(seconds[start:end].tolist(), ids[start:end].tolist()))
+        index._days = sorted(index._entries)
+        return index
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def add(self, reservation_id, fecha):
+        seconds = epoch_seconds(fecha)
+        day = seconds // SECONDS_PER_DAY
+        if day not in self._entries:
+            self._entries[day] = []
+            insort(self._days, day)
+        insort(self._entries[day], (seconds, int(reservation_id)))
+
+    def remove(self, reservation_id, fecha):
+        seconds = epoch_seconds(fecha)
+        day = seconds // SECONDS_PER_DAY
+        entries = self._entries.get(day)
+        if not entries:
+            return
+        key = (seconds, int(reservation_id))
+        position = bisect_left(entries, key)
+        if position < len(entries) and entries[position] == key:
+            del entries[position]
+        if not entries:
+            del self._entries[day]
+            del self._days[bisect_left(self._days, day)]
+
+    def move(self, reservation_id, old_fecha, new_fecha):
+        if epoch_seconds(old_fecha) == epoch_seconds(new_fecha):
+            return
+        self.remove(reservation_id, old_fecha)
+        self.add(reservation_id, new_fecha)
+
+    def ids_between(self, start, end):
+        start, end = epoch_seconds(start), epoch_seconds(end)
+        first = bisect_left(self._days, start // SECONDS_PER_DAY)
+        last = bisect_right(self._days, (end - 1) // SECONDS_PER_DAY)
+
+        ids = []
+        for day in self._days[first:last]:
+            entries = self._entries[day]
+            lo = bisect_left(entries, (start, -1))
+            hi = bisect_left(entries, (end, -1))
+            ids.extend(reservation_id for _, reservation_id in entries[lo:hi])
+        return ids
+
+
+def fold_text(text):
+    # Minúsculas y sin tildes: "Martínez" -> "martinez", "Ñandú" -> "nandu"
+    decomposed = unicodedata.normalize("NFKD", str(text))
+    return "".join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def phone_digits(text):
+    return "".join(c for c in str(text) if c.isdigit())
+
+
+class _TrigramMap:
+    # Asocia cada clave normalizada (nombre o teléfono) con los ids que la usan
+    # y mantiene los trigramas de las claves distintas. Como los nombres y
+    # teléfonos se repiten mucho entre reservas, los trigramas se indexan por
+    # clave y no por reserva. Los ids de cada clave se guardan como lista
+    # ordenada de (-segundos, id), de la reserva más reciente a la más
+    # antigua, para sacar una página de resultados sin ordenar el resto.
+    # Con `short_prefixes`, las consultas de 1 o 2 caracteres se resuelven con
+    # los inicios de la clave y de cada una de sus palabras.
+
+    def __init__(self, short_prefixes=False):
+        self.ids = {}
+        self._postings = {}
+        self._short_prefixes = short_prefixes
+        self._prefixes = {}
+
+    @staticmethod
+    def _trigrams(key):
+        return {key[i:i + 3] for i in range(len(key) - 2)}
+
+    @staticmethod
+    def _starts(key):
+        return {word[:length] for word in key.split() for length in (1, 2)}
+
+    def _index_key(self, key):
+        for trigram in self._trigrams(key):
+            self._postings.setdefault(trigram, set()).add(key)
+        if self._short_prefixes:
+            for prefix in self._starts(key):
+                self._prefixes.setdefault(prefix, set()).add(key)
+
+    def _unindex_key(self, key):
+        for postings, grams in ((self._postings, self._trigrams(key)),
+                                (self._prefixes, self._starts(key) if self._short_prefixes else ())):
+            for gram in grams:
+                keys = postings.get(gram)
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del postings[gram]
+
+    def add(self, key, reservation_id, seconds):
+        if key not in self.ids:
+            self.ids[key] = []
+            self._index_key(key)
+        insort(self.ids[key], (-seconds, reservation_id))
+
+    def bulk_load(self, keys, reservation_ids, seconds):
+        # Carga inicial vectorizada: ordena por clave y fecha descendente,
+        # agrupa los ids por clave y genera los trigramas de todas las claves
+        # distintas columna a columna.
+        keys = pd.Series(keys, dtype=object).reset_index(drop=True)
+        known = keys.str.len().fillna(0).to_numpy() > 0
+        codes, values = pd.factorize(keys[known])
+        reservation_ids = np.asarray(reservation_ids, dtype=np.int64)[known]
+        negative_seconds = -np.asarray(seconds, dtype=np.int64)[known]
+
+        order = np.lexsort((reservation_ids, negative_seconds, codes))
+        sorted_codes = codes[order]
+        entries = list(zip(negative_seconds[order].tolist(), reservation_ids[order].tolist()))
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(sorted_codes)) + 1)).tolist()
+        ends = starts[1:] + [len(entries)]
+        values = np.asarray(values, dtype=object)
+        group_keys = values[sorted_codes[starts]].tolist() if len(order) else []
+        self.ids.update({key: entries[start:end] for key, start, end in zip(group_keys, starts, ends)})
+
+        distinct = pd.Series(values, dtype="string")
+        lengths = distinct.str.len().to_numpy()
+        pieces = []
+        for offset in range(int(lengths.max()) - 2 if len(distinct) else 0):
+            present = lengths - offset >= 3
+            pieces.append(pd.DataFrame({
+                'trigram': distinct[present].str.slice(offset, offset + 3),
+                'key': distinct[present]
+            }))
+        if pieces:
+            pairs = pd.concat(pieces, ignore_index=True)
+            for trigram, group in pairs.groupby('trigram', sort=False)['key']:
+                self._postings.setdefault(trigram, set()).update(group.tolist())
+        if self._short_prefixes:
+            # Pocas claves distintas (nombres): basta con recorrerlas
+            for key in group_keys:
+                for prefix in self._starts(key):
+                    self._prefixes.setdefault(prefix, set()).add(key)
+
+    def remove(self, key, reservation_id, seconds):
+        entries = self.ids.get(key)
+        if entries is None:
+            return
+        entry = (-seconds, reservation_id)
+        position = bisect_left(entries, entry)
+        if position < len(entries) and entries[position] == entry:
+            del entries[position]
+        if not entries:
+            del self.ids[key]
+            self._unindex_key(key)
+
+    def keys_containing(self, query):
+        if len(query) < 3:
+            # Consulta corta: solo claves con alguna palabra que empiece por ella
+            return list(self._prefixes.get(query, ())) if self._short_prefixes else []
+        postings = sorted((self._postings.get(t, set()) for t in self._trigrams(query)), key=len)
+        candidates = set.intersection(*postings) if postings else set()
+        return [key for key in candidates if query in key]
+
+
+def _page(groups, offset, limit):
+    # `groups` asocia cada rango con listas de (-segundos, id) ya ordenadas.
+    # Se saltan los rangos enteros que caen antes de `offset` y del resto se
+    # mezclan solo las cabezas necesarias para llenar la página
+    page = []
+    for rank in sorted(groups):
+        lists = groups[rank]
+        size = sum(len(entries) for entries in lists)
+        if offset >= size:
+            offset -= size
+            continue
+        wanted = size - offset if limit is None else min(size - offset, limit - len(page))
+        if len(lists) == 1:
+            selected = lists[0][offset:offset + wanted]
+        elif len(lists) <= MERGE_MAX_LISTS:
+            selected = islice(heapq.merge(*lists), offset, offset + wanted)
+        else:
+            # Muchas claves con pocas reservas cada una (teléfonos): seleccionar sale más barato que mezclar
+            selected = heapq.nsmallest(offset + wanted, chain.from_iterable(lists))[offset:]
+        page.extend((rank, reservation_id) for _, reservation_id in selected)
+        offset = 0
+        if limit is not None and len(page) >= limit:
+            break
+    return page
+
+
+class SearchIndex:
+    # Índice de búsqueda por nombre (sin tildes ni mayúsculas) y por teléfono
+    # (solo dígitos). Se actualiza al crear, editar y borrar reservas y
+    # devuelve pares (rango, id); un rango menor es una coincidencia mejor:
+    # 0 exacta, 1 al inicio, 2 al inicio de una palabra o final del teléfono,
+    # 3 en cualquier posición. A igual rango, primero la reserva más
+    # reciente. Las consultas de menos de 3 caracteres buscan solo inicios de
+    # palabra en los nombres; los teléfonos necesitan al menos 3 dígitos.
+
+    def __init__(self):
+        self._names = _TrigramMap(short_prefixes=True)
+        self._phones = _TrigramMap()
+
+    @classmethod
+    def from_frame(cls, df):
+        # Se normaliza cada valor distinto una sola vez y se agrupan sus ids
+        index = cls()
+        codes, values = pd.factorize(df['nombre'])
+        names = pd.Series([fold_text(value) for value in values], dtype=object).take(codes)
+        phones = df['telefono'].astype(str).str.replace(r"\D", "", regex=True)
+
+        ids = df['id'].to_numpy(dtype=np.int64)
+        seconds = df['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        index._names.bulk_load(names.to_numpy(dtype=object), ids, seconds)
+        index._phones.bulk_load(phones.to_numpy(dtype=object), ids, seconds)
+        return index
+
+    def add(self, reservation_id, reservation):
+        seconds = epoch_seconds(reservation['fecha'])
+        self._names.add(fold_text(reservation['nombre']), int(reservation_id), seconds)
+        digits = phone_digits(reservation['telefono'])
+        if digits:
+            self._phones.add(digits, int(reservation_id), seconds)
+
+    def remove(self, reservation_id, reservation):
+        seconds = epoch_seconds(reservation['fecha'])
+        self._names.remove(fold_text(reservation['nombre']), int(reservation_id), seconds)
+        self._phones.remove(phone_digits(reservation['telefono']), int(reservation_id), seconds)
+
+    def update(self, reservation_id, old, new):
+        if all(old[column] == new[column] for column in ('nombre', 'telefono', 'fecha')):
+            return
+        self.remove(reservation_id, old)
+        self.add(reservation_id, new)
+
+    def search(self, text, limit=None, offset=0):
+        # Devuelve el total de coincidencias y la página [offset, offset + limit)
+        # como pares (rango, id)
+        names, phones = {}, {}
+
+        query = fold_text(text).strip()
+        if query:
+            for name in self._names.keys_containing(query):
+                if name == query:
+                    rank = 0
+                elif name.startswith(query):
+                    rank = 1
+                elif f" {query}" in name:
+                    rank = 2
+                else:
+                    rank = 3
+                names.setdefault(rank, []).append(self._names.ids[name])
+
+        digits = phone_digits(text)
+        if digits:
+            for phone in self._phones.keys_containing(digits):
+                if phone == digits:
+                    rank = 0
+                elif phone.startswith(digits):
+                    rank = 1
+                elif phone.endswith(digits):
+                    rank = 2
+                else:
+                    rank = 3
+                phones.setdefault(rank, []).append(self._phones.ids[phone])
+
+        if names and phones:
+            # Una reserva puede coincidir por nombre y por teléfono: se queda
+            # con su mejor rango. Solo pasa con consultas de letras y dígitos
+            best = {}
+            for groups in (names, phones):
+                for rank, lists in groups.items():
+                    for entries in lists:
+                        for entry in entries:
+                            best[entry[1]] = min(best.get(entry[1], (rank, entry)), (rank, entry))
+            groups = {}
+            for rank, entry in best.values():
+                groups.setdefault(rank, [[]])[0].append(entry)
+            for lists in groups.values():
+                lists[0].sort()
+        else:
+            groups = names or phones
+        total = sum(len(entries) for lists in groups.values() for entries in lists)
+        return total, _page(groups, offset, limit)
+
+
+class TableIntervalIndex:
+    # Turnos reservados por mesa como listas ordenadas de (inicio, id). Todos
+    # los turnos duran lo mismo, así que los que se solapan con [inicio, fin)
+    # son los que empiezan en (inicio - turno, fin) y se localizan con dos
+    # búsquedas binarias: O(log n) por mesa. Las canceladas y las no presentadas
+    # no ocupan.
+
+    def __init__(self, turn_seconds):
+        self.turn_seconds = turn_seconds
+        self._entries = {}
+
+    @classmethod
+    def from_frame(cls, df, turn_seconds):
+        index = cls(turn_seconds)
+        active = df[df['mesa'].notna() & ~df['estado'].isin(INACTIVE_STATUSES)]
+        seconds = active['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+        for mesa, start, reservation_id in sorted(zip(active['mesa'].astype(int).tolist(), seconds.tolist(),
+                                                      active['id'].tolist())):
+            index._entries.setdefault(mesa, []).append((start, reservation_id))
+        return index
+
+    @staticmethod
+    def _occupies(reservation):
+        return pd.notna(reservation['mesa']) and reservation['estado'] not in INACTIVE_STATUSES
+
+    def add(self, reservation_id, reservation):
+        if self._occupies(reservation):
+            insort(self._entries.setdefault(int(reservation['mesa']), []),
+                   (epoch_seconds(reservation['fecha']), int(reservation_id)))
+
+    def remove(self, reservation_id, reservation):
+        if not self._occupies(reservation):
+            return
+        entries = self._entries.get(int(reservation['mesa']), [])
+        key = (epoch_seconds(reservation['fecha']), int(reservation_id))
+        position = bisect_left(entries, key)
+        if position < len(entries) and entries[position] == key:
+            del entries[position]
+
+    def bookings_overlapping(self, mesa, start, end):
+        entries = self._entries.get(int(mesa), [])
+        lo = bisect_right(entries, (epoch_seconds(start) - self.turn_seconds, float('inf')))
+        hi = bisect_left(entries, (epoch_seconds(end), -1))
+        return [reservation_id for _, reservation_id in entries[lo:hi]]
+
+    def is_free(self, mesa, start, end, exclude_id=None):
+        return all(reservation_id == exclude_id for reservation_id in self.bookings_overlapping(mesa, start, end))
+
+    def free_tables(self, numeros, start, end, exclude_id=None):
+        return [numero for numero in numeros if self.is_free(numero, start, end, exclude_id)]
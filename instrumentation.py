@@ -0,0 +1,102 @@
+import json
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Mediciones individuales que se conservan para la tabla de las más recientes
+RECENT_RECORDS = 500
+
+logger = logging.getLogger("restaurante.rendimiento")
+
+
+class Profiler:
+    # Cronómetro de secciones compartido por todas las sesiones. Acumula por
+    # sección el número de llamadas y los tiempos total, máximo y último, el
+    # número de ejecuciones de cada página y el tamaño de lo que se envía al
+    # navegador (HTML, tablas y, si se activa, gráficos). Con `log_records`
+    # cada medición se escribe además como un registro JSON en el logger
+    # "restaurante.rendimiento".
+
+    def __init__(self, log_records=False):
+        self.log_records = log_records
+        # Serializar un gráfico para medirlo cuesta casi tanto como enviarlo
+        self.measure_figures = False
+        self._lock = threading.Lock()
+        self._spans = {}
+        self._payloads = {}
+        self._reruns = {}
+        self._recent = deque(maxlen=RECENT_RECORDS)
+
+    def _log(self, record):
+        self._recent.append(record)
+        if self.log_records:
+            logger.info(json.dumps(record, ensure_ascii=False, default=str))
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record_span(name, time.perf_counter() - start)
+
+    def record_span(self, name, seconds):
+        milliseconds = seconds * 1000
+        with self._lock:
+            stats = self._spans.setdefault(name, {'llamadas': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'ultima_ms': 0.0})
+            stats['llamadas'] += 1
+            stats['total_ms'] += milliseconds
+            stats['max_ms'] = max(stats['max_ms'], milliseconds)
+            stats['ultima_ms'] = milliseconds
+            self._log({'tipo': "seccion", 'nombre': name, 'ms': round(milliseconds, 3), 'hora': time.time()})
+
+    def record_payload(self, name, size_bytes):
+        with self._lock:
+            stats = self._payloads.setdefault(name, {'envios': 0, 'total_bytes': 0, 'ultimo_bytes': 0})
+            stats['envios'] += 1
+            stats['total_bytes'] += size_bytes
+            stats['ultimo_bytes'] = size_bytes
+            self._log({'tipo': "envio", 'nombre': name, 'bytes': size_bytes, 'hora': time.time()})
+
+    def count_rerun(self, page):
+        with self._lock:
+            self._reruns[page] = self._reruns.get(page, 0) + 1
+            self._log({'tipo': "ejecucion", 'nombre': page, 'hora': time.time()})
+
+    def span_summary(self):
+        with self._lock:
+            df = pd.DataFrame.from_dict(self._spans, orient='index')
+        if df.empty:
+            return pd.DataFrame(columns=['seccion', 'llamadas', 'media_ms', 'max_ms', 'ultima_ms', 'total_ms'])
+        df['media_ms'] = df['total_ms'] / df['llamadas']
+        df = df.rename_axis('seccion').reset_index().sort_values('total_ms', ascending=False)
+        return df[['seccion', 'llamadas', 'media_ms', 'max_ms', 'ultima_ms', 'total_ms']].round(3)
+
+    def payload_summary(self):
+        with self._lock:
+            df = pd.DataFrame.from_dict(self._payloads, orient='index')
+        if df.empty:
+            return pd.DataFrame(columns=['envio', 'envios', 'media_kb', 'ultimo_kb'])
+        df['media_kb'] = df['total_bytes'] / df['envios'] / 1024
+        df['ultimo_kb'] = df['ultimo_bytes'] / 1024
+        df = df.rename_axis('envio').reset_index().sort_values('media_kb', ascending=False)
+        return df[['envio', 'envios', 'media_kb', 'ultimo_kb']].round(2)
+
+    def rerun_counts(self):
+        with self._lock:
+            return pd.Series(self._reruns, name='ejecuciones', dtype='int64').rename_axis('pagina').reset_index()
+
+    def recent(self):
+        with self._lock:
+            return pd.DataFrame(list(self._recent))
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self._payloads.clear()
+            self._reruns.clear()
+            self._recent.clear()
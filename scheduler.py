@@ -0,0 +1,158 @@
+import logging
+import threading
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from seating import DEFAULT_TURN_MINUTES
+from storage import SWEEP_WATERMARK, to_epoch
+
+SWEEP_SECONDS = 60
+# Minutos tras la hora de la reserva sin sentar al grupo para darlo por no presentado
+NO_SHOW_GRACE_MINUTES = 20
+# Un grupo puede sentarse algo antes de su hora
+EARLY_SEATING_MINUTES = 30
+# Al recuperar un periodo sin barrer se avanza por tramos de estos días
+CATCH_UP_CHUNK_DAYS = 7
+ACTIVE_STATUSES = ["Confirmada", "Pendiente"]
+
+logger = logging.getLogger("restaurante.barrido")
+
+
+def plan_transitions(due, now, table_states, turn_start, open_turn_start, turn_minutes=DEFAULT_TURN_MINUTES):
+    # Decide el nuevo estado de las reservas vencidas aún activas y las mesas
+    # que se liberan. Un grupo está sentado si su mesa se ocupó cerca de su
+    # hora de llegada (registro de estados de mesa), siga ocupada o no.
+    #  - Pasado el margen sin sentar (solo reservas con mesa): "No presentada";
+    #    su mesa se libera si seguía reservada.
+    #  - Turno acabado: "Completada"; su mesa se libera si seguía ocupada por él.
+    # Las reservas sin mesa no permiten saber si el grupo vino: se completan
+    # al acabar el turno. Devuelve [(id, estado, versión)] y, por id de
+    # reserva, la mesa que se libera si el cambio llega a escribirse.
+    turn = pd.Timedelta(minutes=turn_minutes)
+    grace = pd.Timedelta(minutes=NO_SHOW_GRACE_MINUTES)
+    early = pd.Timedelta(minutes=EARLY_SEATING_MINUTES)
+    updates, released = [], {}
+
+    for reservation in due.itertuples(index=False):
+        has_table = pd.notna(reservation.mesa)
+        mesa = int(reservation.mesa) if has_table else None
+        seated_at = turn_start(mesa, reservation.fecha - early, reservation.fecha + grace) if has_table else None
+        if has_table and seated_at is None:
+            updates.append((reservation.id, "No presentada", reservation.version))
+            if table_states.get(mesa) == "Reservada":
+                released[reservation.id] = mesa
+        elif reservation.fecha + turn <= now:
+            updates.append((reservation.id, "Completada", reservation.version))
+            # Solo si el turno en curso es el suyo y no el de un grupo sentado después
+            if has_table and open_turn_start(mesa) == seated_at:
+                released[reservation.id] = mesa
+    return updates, released
+
+
+def sweep_window(store, since, until):
+    # Barre las reservas que pueden haber vencido entre `since` y `until`
+    # (desde un turno antes de `since` hasta `until` menos el margen) como
+    # si fuera `until`. Devuelve el número de reservas revisadas, los
+    # estados escritos y las mesas liberadas.
+    window_start = min(since, until) - timedelta(minutes=DEFAULT_TURN_MINUTES)
+    due = store.reservations_between(window_start, until - timedelta(minutes=NO_SHOW_GRACE_MINUTES))
+    return sweep_reservations(store, due, until)
+
+
+def sweep_reservations(store, due, until):
+    # Aplica los cambios de estado de las reservas `due` ya vencidas a `until`
+    due = due[due['estado'].isin(ACTIVE_STATUSES)]
+
+    updates, released = [], {}
+    if not due.empty:
+        tables = store.tables()
+        table_states = dict(zip(tables['numero'].tolist(), tables['estado'].astype(str).tolist()))
+        updates, released = plan_transitions(due, until, table_states, store.turn_start_between,
+                                             store.open_turn_start)
+    updated = set(store.update_reservation_statuses(updates))
+    released = sorted({mesa for reservation_id, mesa in released.items() if reservation_id in updated})
+    for numero in released:
+        store.set_table_status(numero, "Libre")
+    estados = [estado for reservation_id, estado, _ in updates if int(reservation_id) in updated]
+    return len(due), estados, released
+
+
+def sweep_due(store, now):
+    # Barre desde la marca guardada hasta `now` por tramos, guardando la marca
+    # tras cada uno: un reinicio retoma donde se quedó, y una base sin marca
+    # empieza por su primera reserva. Después revisa las reservas escritas
+    # con fecha anterior a la marca, que ninguna ventana volverá a cubrir;
+    # las que aún no han vencido entran en la ventana del barrido siguiente.
+    watermark = store.sequence_value(SWEEP_WATERMARK)
+    if watermark is None:
+        first = store.first_reservation_time()
+        since = now if first is None else min(first, now)
+    else:
+        since = pd.Timestamp(watermark, unit='s')
+
+    result = {'momento': now.to_pydatetime(), 'revisadas': 0, 'completadas': 0, 'no_presentadas': 0,
+              'mesas_liberadas': 0}
+    def count(reviewed, estados, released):
+        result['revisadas'] += reviewed
+        result['completadas'] += estados.count("Completada")
+        result['no_presentadas'] += estados.count("No presentada")
+        result['mesas_liberadas'] += len(released)
+
+    while True:
+        until = min(since + timedelta(days=CATCH_UP_CHUNK_DAYS), now)
+        count(*sweep_window(store, since, until))
+        store.set_sequence_value(SWEEP_WATERMARK, to_epoch(until))
+        if until >= now:
+            break
+        since = until
+
+    behind = store.take_reservations_behind_sweep()
+    behind = behind[behind['fecha'] <= now - timedelta(minutes=NO_SHOW_GRACE_MINUTES)]
+    count(*sweep_reservations(store, behind, now))
+    return result
+
+
+class StatusScheduler:
+    # Barrido periódico en un hilo propio, compartido por todas las sesiones.
+    # Cada barrido lee por el índice de días solo las reservas que pueden
+    # haber vencido desde el anterior (desde un turno antes del último
+    # barrido hasta ahora menos el margen), nunca el histórico completo, y
+    # escribe sus cambios en un único lote. Solo toca reservas activas, así
+    # que repetir un barrido no cambia nada. Hasta dónde se ha barrido se
+    # guarda en la base, así que tras un reinicio se recupera todo el
+    # periodo sin barrer.
+
+    def __init__(self, store, interval=SWEEP_SECONDS):
+        self._store = store
+        self.interval = interval
+        self.last_result = None
+        self.last_error = None
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="barrido-estados", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.sweep()
+            except Exception as error:
+                self.last_error = error
+                logger.exception("Error en el barrido de estados")
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def stop(self):
+        # Termina el hilo tras el barrido en curso
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+
+    def sweep(self, now=None):
+        now = pd.Timestamp(now or datetime.now())
+        with self._lock:
+            self.last_result = sweep_due(self._store, now)
+            self.last_error = None
+            return self.last_result
@@ -0,0 +1,116 @@
+import heapq
+from bisect import bisect_left
+
+import numpy as np
+import pandas as pd
+
+from indices import INACTIVE_STATUSES, fold_text
+
+DEFAULT_TURN_MINUTES = 90
+LOCATIONS = ["Interior", "Exterior", "Terraza"]
+
+
+def preferred_location(notas):
+    # "Prefieren mesa interior" -> "Interior"
+    folded = fold_text(notas or "")
+    for location in LOCATIONS:
+        if fold_text(location) in folded:
+            return location
+    return None
+
+
+def _intervals(reservations, turn_minutes):
+    active = reservations[~reservations['estado'].isin(INACTIVE_STATUSES)]
+    starts = active['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64)
+    return active, starts, starts + turn_minutes * 60
+
+
+def plan_seating(reservations, tables, turn_minutes=DEFAULT_TURN_MINUTES):
+    # Plan de mesas para las reservas de un día. Barrido por hora de llegada
+    # (a igual hora, primero los grupos grandes): cada mesa se agrupa por
+    # capacidad en un montículo ordenado por la hora a la que queda libre, y
+    # cada grupo ocupa la mesa libre de menor capacidad suficiente (best fit),
+    # prefiriendo la ubicación pedida en las notas. Las reservas que ya
+    # tienen mesa se respetan y bloquean su mesa durante su turno.
+    # Devuelve un DataFrame con id y mesa (NaN si no cabe en ninguna).
+    active, starts, ends = _intervals(reservations, turn_minutes)
+    if active.empty:
+        return pd.DataFrame({'id': pd.Series(dtype='int64'), 'mesa': pd.Series(dtype='float64')})
+
+    capacities = sorted(tables['capacidad'].unique().tolist())
+    location_of = dict(zip(tables['numero'].tolist(), tables['ubicacion'].tolist()))
+    capacity_of = dict(zip(tables['numero'].tolist(), tables['capacidad'].tolist()))
+    free_at = {numero: [] for numero in capacity_of}
+
+    # Turnos ya comprometidos por asignaciones manuales
+    fixed = active['mesa'].notna().to_numpy() & active['mesa'].isin(list(capacity_of)).to_numpy()
+    for numero, start, end in zip(active['mesa'][fixed].astype(int), starts[fixed], ends[fixed]):
+        free_at[numero].append((start, end))
+
+    def is_free(numero, start, end):
+        return all(end <= busy_start or start >= busy_end for busy_start, busy_end in free_at[numero])
+
+    # Montículo por capacidad: (libre_desde, numero)
+    heaps = {capacity: [] for capacity in capacities}
+    for numero, capacity in capacity_of.items():
+        heapq.heappush(heaps[capacity], (0, numero))
+
+    order = np.lexsort((-active['comensales'].to_numpy(), starts))
+    assigned = np.full(len(active), np.nan)
+    assigned[fixed] = active['mesa'].to_numpy(dtype=float, na_value=np.nan)[fixed]
+    ids = active['id'].to_numpy()
+    party_sizes = active['comensales'].to_numpy()
+    notes = active['notas'].astype(object).fillna("").tolist()
+
+    for position in order:
+        if fixed[position]:
+            continue
+        start, end = starts[position], ends[position]
+        wanted = preferred_location(notes[position])
+
+        best = None
+        for capacity in capacities[bisect_left(capacities, party_sizes[position]):]:
+            heap = heaps[capacity]
+            # Candidatas de esta capacidad que ya están libres a la hora de llegada
+            candidates = []
+            while heap and heap[0][0] <= start:
+                candidates.append(heapq.heappop(heap))
+            usable = [c for c in candidates if is_free(c[1], start, end)]
+            choice = next((c for c in usable if location_of[c[1]] == wanted), usable[0] if usable else None)
+            for candidate in candidates:
+                if candidate is not choice:
+                    heapq.heappush(heap, candidate)
+            if choice is not None:
+                best = choice[1]
+                heapq.heappush(heap, (end, best))
+                break
+
+        if best is not None:
+            assigned[position] = best
+            free_at[best].append((start, end))
+
+    return pd.DataFrame({'id': ids, 'mesa': assigned})
+
+
+def suggest_table(reservations, tables, fecha, comensales, ubicacion=None,
+                  exclude_id=None, turn_minutes=DEFAULT_TURN_MINUTES):
+    # Mesa más ajustada al grupo que está libre durante el turno pedido,
+    # considerando solo las reservas del día (O(reservas del día + mesas)).
+    if tables.empty:
+        return None
+
+    active, starts, ends = _intervals(reservations, turn_minutes)
+    others = active['id'].to_numpy() != exclude_id
+    start = int(pd.Timestamp(fecha).timestamp())
+    overlapping = others & (starts < start + turn_minutes * 60) & (ends > start)
+    busy = set(active['mesa'][overlapping].dropna().astype(int))
+
+    candidates = tables[(tables['capacidad'] >= comensales) & ~tables['numero'].isin(busy)]
+    if candidates.empty:
+        return None
+
+    ranked = candidates.assign(
+        sobrante=candidates['capacidad'] - comensales,
+        otra_ubicacion=candidates['ubicacion'] != ubicacion if ubicacion else False
+    ).sort_values(['sobrante', 'otra_ubicacion', 'numero'])
+    return int(ranked['numero'].iloc[0])
@@ -0,0 +1,860 @@
+import os
+import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from analytics import STATUSES, TABLE_STATUSES, DailyRollup, TableEventLog
+from forecasting import SERVICE_HOURS
+from indices import DayIndex, SearchIndex, TableIntervalIndex
+from seating import DEFAULT_TURN_MINUTES, LOCATIONS
+from synthetic import generate_example_data, generate_table_events
+from waitlist import WaitQueue
+
+DB_PATH = os.environ.get("RESTAURANTE_DB", "restaurante.db")
+
+RESERVATION_COLUMNS = ["id", "nombre", "telefono", "fecha", "comensales", "mesa", "estado", "notas"]
+TABLE_COLUMNS = ["numero", "capacidad", "ubicacion", "estado", "pos_x", "pos_y"]
+# Columnas leídas de la base: los datos más el sello de versión de cada fila
+STORED_RESERVATION_COLUMNS = RESERVATION_COLUMNS + ["version"]
+STORED_TABLE_COLUMNS = TABLE_COLUMNS + ["version"]
+WAITLIST_COLUMNS = ["id", "nombre", "telefono", "comensales", "llegada"]
+TABLE_EVENT_COLUMNS = ["mesa", "estado", "momento", "comensales"]
+# Tamaño máximo de un grupo y capacidad máxima de una mesa, como en los formularios
+MAX_PARTY_SIZE = 20
+
+# Esquema compacto de la copia en memoria: los enumerados como categorías de
+# valores fijos, enteros pequeños (mesa admite nulos con pd.NA), la fecha en
+# datetime64[ns] y los textos como objetos Python: editar una celda es O(1)
+# (una categoría nueva o el texto de pyarrow copiarían toda la columna). Al
+# cargar, cada texto distinto de las notas se guarda una vez
+RESERVATION_DTYPES = {
+    'id': 'int64',
+    'nombre': pd.StringDtype("python"),
+    'telefono': pd.StringDtype("python"),
+    'fecha': 'datetime64[ns]',
+    'comensales': 'int16',
+    'mesa': 'Int16',
+    'estado': pd.CategoricalDtype(STATUSES),
+    'notas': pd.StringDtype("python"),
+    'version': 'int64',
+}
+TABLE_DTYPES = {
+    'numero': 'int16',
+    'capacidad': 'int16',
+    'ubicacion': pd.CategoricalDtype(LOCATIONS),
+    'estado': pd.CategoricalDtype(TABLE_STATUSES),
+    'pos_x': 'float64',
+    'pos_y': 'float64',
+    'version': 'int64',
+}
+
+# Cambios recientes que se conservan para el aviso a otras sesiones
+CHANGE_LOG_SIZE = 1000
+# Hasta dónde ha barrido el planificador de estados (segundos), en la tabla de secuencias
+SWEEP_WATERMARK = "barrido_estados"
+
+# Borrados pendientes a partir de los cuales se compacta la copia en memoria
+COMPACTION_MIN_TOMBSTONES = 1000
+COMPACTION_RATIO = 0.1
+# Inserciones acumuladas antes de volcarlas a la copia en memoria; el umbral
+# crece con el tamaño para que el coste de cada volcado se amortice en O(1)
+APPEND_BUFFER_MIN_ROWS = 256
+APPEND_BUFFER_RATIO = 0.05
+
+# La fecha se guarda como segundos desde la época (hora local sin zona) para que
+# los rangos por día sean comparaciones de enteros sobre el índice.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reservas (
+    id INTEGER PRIMARY KEY,
+    nombre TEXT NOT NULL,
+    telefono TEXT NOT NULL,
+    fecha INTEGER NOT NULL,
+    comensales INTEGER NOT NULL,
+    mesa INTEGER,
+    estado TEXT NOT NULL,
+    notas TEXT NOT NULL DEFAULT '',
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_reservas_fecha ON reservas(fecha);
+CREATE INDEX IF NOT EXISTS idx_reservas_mesa ON reservas(mesa);
+CREATE INDEX IF NOT EXISTS idx_reservas_estado ON reservas(estado);
+CREATE INDEX IF NOT EXISTS idx_reservas_telefono ON reservas(telefono);
+
+CREATE TABLE IF NOT EXISTS secuencias (
+    nombre TEXT PRIMARY KEY,
+    valor INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS mesas (
+    numero INTEGER PRIMARY KEY,
+    capacidad INTEGER NOT NULL,
+    ubicacion TEXT NOT NULL,
+    estado TEXT NOT NULL,
+    pos_x REAL,
+    pos_y REAL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE TABLE IF NOT EXISTS lista_espera (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre TEXT NOT NULL,
+    telefono TEXT NOT NULL DEFAULT '',
+    comensales INTEGER NOT NULL,
+    llegada INTEGER NOT NULL
+);
+
+-- Historial de solo anexado de los estados de las mesas; comensales solo
+-- se conoce al sentar a un grupo de la lista de espera
+CREATE TABLE IF NOT EXISTS eventos_mesa (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    mesa INTEGER NOT NULL,
+    estado TEXT NOT NULL,
+    momento INTEGER NOT NULL,
+    comensales INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_eventos_mesa_momento ON eventos_mesa(momento);
+
+-- Reservas creadas, editadas o importadas con fecha anterior a la marca del
+-- barrido: el barrido por ventanas ya no pasará por ellas
+CREATE TABLE IF NOT EXISTS barrido_pendiente (
+    id INTEGER PRIMARY KEY
+);
+"""
+
+
+class ConcurrentModificationError(Exception):
+    # La fila cambió desde que se leyó (su versión ya no es la esperada)
+    pass
+
+
+def to_epoch(value):
+    return int(pd.Timestamp(value).timestamp())
+
+
+def _check_range(column, values, low=None):
+    # astype a un entero estrecho da la vuelta en silencio: se rechaza antes
+    info = np.iinfo(RESERVATION_DTYPES[column].lower())
+    values = pd.to_numeric(pd.Series(values), errors='raise').dropna()
+    low = info.min if low is None else low
+    out_of_range = values[(values < low) | (values > info.max)]
+    if len(out_of_range):
+        raise ValueError(f"Valor de {column} fuera de rango ({low}..{info.max}): {out_of_range.iloc[0]}")
+
+
+def enforce_reservation_schema(df):
+    _check_range('comensales', df['comensales'], low=1)
+    _check_range('mesa', df['mesa'])
+    return df.astype(RESERVATION_DTYPES)
+
+
+def coerce_reservation_value(column, value):
+    # Valor de una celda con el tipo del esquema en memoria
+    if column == 'fecha':
+        return pd.Timestamp(value).as_unit('ns')
+    if column == 'mesa':
+        _check_range(column, [value])
+        return int(value) if pd.notna(value) else pd.NA
+    if column == 'comensales':
+        _check_range(column, [value], low=1)
+        return int(value)
+    if column == 'estado' and value not in STATUSES:
+        raise ValueError(f"Estado de reserva desconocido: {value}")
+    if column == 'notas':
+        return str(value) if pd.notna(value) else ""
+    return value
+
+
+def _optional_float(value):
+    return float(value) if value is not None and pd.notna(value) else None
+
+
+class ReservationStore:
+    # Repositorio de reservas y mesas sobre SQLite en modo WAL. Una única
+    # instancia se comparte entre sesiones; el candado serializa el acceso a la
+    # conexión, ya que Streamlit atiende cada sesión en su propio hilo.
+    # Las lecturas de reservas se sirven desde una copia en memoria indexada
+    # por id y por día, que cada escritura mantiene al día. Cada escritura
+    # incrementa además `version`, que invalida los agregados cacheados.
+    # Los ids salen de una secuencia monótona persistida (nunca se reutilizan)
+    # y los borrados solo marcan la fila; la compactación los elimina en bloque.
+    # Las altas se acumulan en un búfer pequeño que se vuelca de una vez.
+    # Cada fila lleva un sello de versión para las escrituras con
+    # comparación previa (expected_version), y las escrituras se registran en
+    # un historial corto que las demás sesiones consultan con changes_since.
+    # La lista de espera de clientes sin reserva vive en su propia tabla y en
+    # una cola en memoria (WaitQueue) que los cambios de estado de las mesas
+    # mantienen al día para estimar las esperas. Cada cambio de estado de una
+    # mesa se anexa además a un registro de eventos (TableEventLog) del que
+    # salen los turnos reales, la utilización y la ocupación por minuto.
+
+    def __init__(self, path=DB_PATH, example_data=True):
+        self.path = path
+        self.version = 0
+        self._next_id = 1
+        self._tombstones = set()
+        self._pending = {}
+        self._changes = deque(maxlen=CHANGE_LOG_SIZE)
+        self._wait_queue = WaitQueue()
+        self._lock = threading.RLock()
+        self._local = threading.local()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._load_table_events()
+
+        if example_data and self._count("reservas") == 0 and self._count("mesas") == 0:
+            reservations, tables = generate_example_data()
+            self.bulk_insert_tables(tables)
+            self.bulk_insert_reservations(reservations)
+            self.bulk_insert_table_events(generate_table_events(reservations))
+        else:
+            self._load_reservations()
+        self._init_sequence()
+        self._load_waitlist()
+
+    def _migrate(self):
+        # Bases creadas antes de las coordenadas del plano y de los sellos de versión
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(mesas)")}
+        for column in ("pos_x", "pos_y"):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE mesas ADD COLUMN {column} REAL")
+        for table in ("reservas", "mesas"):
+            columns = {row[1] for row in self._conn.execute(f"PRAGMA table_info({table})")}
+            if "version" not in columns:
+                self._conn.execute(f"ALTER TABLE {table} ADD COLUMN version INTEGER NOT NULL DEFAULT 1")
+
+    def _init_sequence(self):
+        max_id = self._query("SELECT COALESCE(MAX(id), 0) FROM reservas")[0][0]
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR IGNORE INTO secuencias (nombre, valor) VALUES ('reservas', ?)", (max_id,))
+            stored = self._conn.execute("SELECT valor FROM secuencias WHERE nombre = 'reservas'").fetchone()[0]
+            self._next_id = max(stored, max_id) + 1
+
+    def _allocate_ids(self, count):
+        # Reserva un bloque de ids consecutivos y devuelve el primero.
+        # Se llama dentro de la transacción de la inserción y al principio de
+        # ella: el UPDATE toma el cerrojo de escritura de la base, así que
+        # varios procesos sobre la misma base no reciben los mismos ids
+        self._conn.execute(
+            "UPDATE secuencias SET valor = MAX(valor, ?) + ? WHERE nombre = 'reservas'", (self._next_id - 1, count)
+        )
+        last_id = self._conn.execute("SELECT valor FROM secuencias WHERE nombre = 'reservas'").fetchone()[0]
+        self._next_id = last_id + 1
+        return last_id - count + 1
+
+    def _allocate_id(self):
+        return self._allocate_ids(1)
+
+    def sequence_value(self, name):
+        stored = self._query("SELECT valor FROM secuencias WHERE nombre = ?", (name,))
+        return stored[0][0] if stored else None
+
+    def set_sequence_value(self, name, value):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO secuencias (nombre, valor) VALUES (?, ?)", (name, int(value)))
+
+    def _queue_behind_sweep(self, ids, fechas):
+        # Se llama dentro de la transacción de la escritura; `fechas` en segundos
+        watermark = self._conn.execute(
+            "SELECT valor FROM secuencias WHERE nombre = ?", (SWEEP_WATERMARK,)
+        ).fetchone()
+        if watermark is None:
+            # Sin marca, el primer barrido empieza por la reserva más antigua
+            return
+        behind = [(int(reservation_id),) for reservation_id, fecha in zip(ids, fechas) if fecha < watermark[0]]
+        if behind:
+            self._conn.executemany("INSERT OR IGNORE INTO barrido_pendiente (id) VALUES (?)", behind)
+
+    def take_reservations_behind_sweep(self):
+        # Saca de la cola las reservas apuntadas para el barrido y las
+        # devuelve; una escritura posterior las vuelve a apuntar
+        with self._lock, self._conn:
+            queued = [row[0] for row in self._conn.execute("SELECT id FROM barrido_pendiente")]
+            self._conn.execute("DELETE FROM barrido_pendiente")
+            return self._rows([reservation_id for reservation_id in queued if self._exists(reservation_id)])
+
+    def first_reservation_time(self):
+        first = self._query("SELECT MIN(fecha) FROM reservas")[0][0]
+        return None if first is None else pd.Timestamp(first, unit='s')
+
+    def _count(self, table):
+        with self._lock:
+            return self._conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _reservation_frame(self, rows):
+        df = pd.DataFrame(rows, columns=STORED_RESERVATION_COLUMNS)
+        df['fecha'] = pd.to_datetime(df['fecha'], unit='s')
+        # Las notas se repiten mucho: las filas con el mismo texto comparten objeto
+        df['notas'] = pd.array(pd.Categorical(df['notas']).astype(object), dtype=RESERVATION_DTYPES['notas'])
+        return enforce_reservation_schema(df)
+
+    def _load_reservations(self):
+        rows = self._query(f"SELECT {', '.join(STORED_RESERVATION_COLUMNS)} FROM reservas ORDER BY fecha")
+        with self._lock:
+            self._reservations = self._reservation_frame(rows).set_index('id', drop=False).rename_axis(None)
+            self._tombstones = set()
+            self._pending = {}
+            self._day_index = DayIndex.from_frame(self._reservations)
+            self._rollup = DailyRollup.from_frame(self._reservations)
+            self._search_index = SearchIndex.from_frame(self._reservations)
+            self._table_intervals = TableIntervalIndex.from_frame(self._reservations, DEFAULT_TURN_MINUTES * 60)
+            self._bump_version()
+
+    def _load_table_events(self):
+        rows = self._query(f"SELECT {', '.join(TABLE_EVENT_COLUMNS)} FROM eventos_mesa ORDER BY id")
+        with self._lock:
+            self._table_events = TableEventLog.from_rows(rows)
+            self._wait_queue.set_turn_times(self._table_events.turn_seconds_by_size())
+
+    def _log_table_event(self, numero, estado, momento, comensales=None):
+        # Se llama dentro de la transacción del cambio de estado
+        self._conn.execute(
+            "INSERT INTO eventos_mesa (mesa, estado, momento, comensales) VALUES (?, ?, ?, ?)",
+            (int(numero), estado, int(momento), None if comensales is None else int(comensales))
+        )
+        self._table_events.append(numero, estado, momento, comensales)
+        if estado != "Ocupada":
+            # Un turno cerrado actualiza la duración esperada de la lista de espera
+            self._wait_queue.set_turn_times(self._table_events.turn_seconds_by_size())
+
+    def _log_table_states(self, numeros):
+        # Estado actual de las mesas dadas tras una carga o importación
+        now = to_epoch(datetime.now())
+        numeros = {int(numero) for numero in numeros}
+        for numero, estado in self._conn.execute("SELECT numero, estado FROM mesas").fetchall():
+            if numero in numeros:
+                self._log_table_event(numero, estado, now)
+
+    def _capacities(self):
+        return dict(self._query("SELECT numero, capacidad FROM mesas"))
+
+    def _load_waitlist(self):
+        rows = self._query("SELECT id, comensales, llegada FROM lista_espera ORDER BY llegada, id")
+        with self._lock:
+            for party_id, comensales, llegada in rows:
+                self._wait_queue.add(party_id, comensales, llegada)
+            self._sync_wait_tables()
+
+    def _sync_wait_tables(self):
+        # Estado de todas las mesas en la cola de espera tras una carga o
+        # importación; las mesas que no cambian conservan su hora de liberación
+        # y las ya ocupadas se liberan al final del turno abierto del registro
+        now = to_epoch(datetime.now())
+        for numero, capacidad, estado in self._query("SELECT numero, capacidad, estado FROM mesas"):
+            opened = self._table_events.open_turn(numero) if estado == "Ocupada" else None
+            if opened is None:
+                self._wait_queue.set_table(numero, estado, now, capacidad=capacidad)
+            else:
+                self._wait_queue.set_table(numero, estado, opened, capacidad=capacidad,
+                                           comensales=self._table_events.open_turn_size(numero))
+
+    def _bump_version(self, kind=None, key=None):
+        with self._lock:
+            self.version += 1
+            if kind is not None:
+                self._changes.append((self.version, kind, key))
+            recorded = getattr(self._local, 'versions', None)
+            if recorded is not None:
+                recorded.append(self.version)
+
+    @contextmanager
+    def recording_versions(self):
+        # Versiones de las escrituras hechas desde este hilo dentro del bloque
+        versions = []
+        self._local.versions = versions
+        try:
+            yield versions
+        finally:
+            self._local.versions = None
+
+    def changes_since(self, version):
+        # Escrituras posteriores a `version`, como (versión, tipo, clave)
+        with self._lock:
+            return [change for change in self._changes if change[0] > version]
+
+    def _rows(self, ids):
+        with self._lock:
+            pending_ids = [reservation_id for reservation_id in ids if reservation_id in self._pending]
+            if not pending_ids:
+                return self._reservations.loc[ids].reset_index(drop=True)
+
+            stored_ids = [reservation_id for reservation_id in ids if reservation_id not in self._pending]
+            df = pd.concat([
+                self._reservations.loc[stored_ids],
+                self._pending_frame(pending_ids)
+            ])
+            return df.loc[ids].reset_index(drop=True)
+
+    def _row(self, reservation_id):
+        if reservation_id in self._pending:
+            return pd.Series(self._pending[reservation_id], name=reservation_id)
+        return self._reservations.loc[reservation_id].copy()
+
+    def _pending_frame(self, ids):
+        df = pd.DataFrame([self._pending[reservation_id] for reservation_id in ids], columns=STORED_RESERVATION_COLUMNS)
+        return enforce_reservation_schema(df).set_index('id', drop=False).rename_axis(None)
+
+    def _flush_pending(self):
+        # Un único concat por lote de altas en lugar de uno por reserva
+        with self._lock:
+            if self._pending:
+                self._reservations = pd.concat([self._reservations, self._pending_frame(list(self._pending))])
+                self._pending = {}
+
+    def _maybe_flush(self):
+        threshold = max(APPEND_BUFFER_MIN_ROWS, APPEND_BUFFER_RATIO * len(self._reservations))
+        if len(self._pending) >= threshold:
+            self._flush_pending()
+
+    def _exists(self, reservation_id):
+        if reservation_id in self._pending:
+            return True
+        return reservation_id in self._reservations.index and reservation_id not in self._tombstones
+
+    def live_reservations(self):
+        with self._lock:
+            self._flush_pending()
+            if not self._tombstones:
+                return self._reservations.reset_index(drop=True)
+            return self._reservations.drop(index=list(self._tombstones)).reset_index(drop=True)
+
+    def compact(self):
+        # Elimina en una sola copia las filas marcadas como borradas
+        with self._lock:
+            self._flush_pending()
+            if self._tombstones:
+                self._reservations = self._reservations.drop(index=list(self._tombstones))
+                self._tombstones = set()
+
+    def _maybe_compact(self):
+        threshold = max(COMPACTION_MIN_TOMBSTONES, COMPACTION_RATIO * len(self._reservations))
+        if len(self._tombstones) >= threshold:
+            self.compact()
+
+    # --- Lecturas ---
+
+    def reservations_between(self, start, end, mesa=None):
+        # Índice y filas se leen bajo el mismo cerrojo: una baja entre ambos dejaría ids sin fila
+        with self._lock:
+            df = self._rows(self._day_index.ids_between(start, end))
+        if mesa is not None:
+            df = df[df['mesa'] == mesa].reset_index(drop=True)
+        return df
+
+    def reservations_for_day(self, day):
+        start = datetime.combine(day, datetime.min.time())
+        return self.reservations_between(start, start + timedelta(days=1))
+
+    def get_reservation(self, reservation_id):
+        reservation_id = int(reservation_id)
+        with self._lock:
+            if not self._exists(reservation_id):
+                return None
+            return self._row(reservation_id)
+
+    def search(self, text, limit=None, offset=0):
+        # Total de coincidencias y las filas de [offset, offset + limit), por
+        # relevancia y, a igual relevancia, por fecha más reciente. Solo se
+        # construyen las filas de la página
+        with self._lock:
+            total, matches = self._search_index.search(text, limit, offset)
+            df = self._rows([reservation_id for _, reservation_id in matches])
+        return total, df.assign(relevancia=[rank for rank, _ in matches])
+
+    def available_tables(self, start, end=None, exclude_id=None):
+        # Mesas sin turno solapado en [start, end); por defecto, un turno completo
+        start = pd.Timestamp(start)
+        end = start + pd.Timedelta(minutes=DEFAULT_TURN_MINUTES) if end is None else pd.Timestamp(end)
+        numeros = self.tables()['numero'].tolist()
+        with self._lock:
+            return self._table_intervals.free_tables(numeros, start, end, exclude_id)
+
+    def open_turn_start(self, numero):
+        # Momento en que se ocupó la mesa si sigue ocupada, según el registro de estados
+        with self._lock:
+            start = self._table_events.open_turn(numero)
+        return None if start is None else pd.Timestamp(start, unit='s')
+
+    def turn_start_between(self, numero, start, end):
+        # Primer momento en [start, end] en que se ocupó la mesa, aunque ya esté libre
+        with self._lock:
+            moment = self._table_events.first_turn_start(numero, to_epoch(start), to_epoch(end))
+        return None if moment is None else pd.Timestamp(moment, unit='s')
+
+    def tables(self):
+        rows = self._query(f"SELECT {', '.join(STORED_TABLE_COLUMNS)} FROM mesas ORDER BY rowid")
+        return pd.DataFrame(rows, columns=STORED_TABLE_COLUMNS).astype(TABLE_DTYPES)
+
+    def waitlist(self):
+        # Grupos en espera por orden de llegada, con la espera estimada en
+        # minutos (NaN si ninguna mesa de la sala les cabe)
+        rows = self._query(f"SELECT {', '.join(WAITLIST_COLUMNS)} FROM lista_espera ORDER BY llegada, id")
+        df = pd.DataFrame(rows, columns=WAITLIST_COLUMNS)
+        df['llegada'] = pd.to_datetime(df['llegada'], unit='s')
+        with self._lock:
+            waits = self._wait_queue.estimates(to_epoch(datetime.now()))
+        df['espera_min'] = [waits.get(party_id) for party_id in df['id'].tolist()]
+        df['espera_min'] = df['espera_min'].astype('float64') / 60
+        return df
+
+    def next_walk_in(self, capacidad):
+        # Grupo al que ofrecer una mesa de `capacidad` que acaba de quedar libre
+        with self._lock:
+            party_id = self._wait_queue.next_party(int(capacidad))
+        if party_id is None:
+            return None
+        rows = self._query(f"SELECT {', '.join(WAITLIST_COLUMNS)} FROM lista_espera WHERE id = ?", (party_id,))
+        if not rows:
+            return None
+        party = pd.Series(dict(zip(WAITLIST_COLUMNS, rows[0])))
+        party['llegada'] = pd.to_datetime(party['llegada'], unit='s')
+        return party
+
+    # --- Agregados para el análisis ---
+
+    # Turnos reales de las mesas a partir del registro de estados
+    def table_turn_times(self, start, end):
+        with self._lock:
+            return self._table_events.turn_times(start, end)
+
+    def occupancy_series(self, start, end):
+        capacities = self._capacities()
+        with self._lock:
+            return self._table_events.occupancy_series(start, end, to_epoch(datetime.now()), capacities)
+
+    def table_utilization(self, start, end):
+        # Rotación (turnos por mesa y día) y utilización de plazas: horas de
+        # plaza ocupadas sobre las disponibles en las horas de servicio
+        capacities = self._capacities()
+        with self._lock:
+            totals = self._table_events.seat_hours(start, end, to_epoch(datetime.now()), capacities)
+        days = max((pd.Timestamp(end) - pd.Timestamp(start)).days, 1)
+        available = sum(capacities.values()) * len(SERVICE_HOURS) * days
+        return pd.Series({
+            **totals,
+            'rotacion': totals['turnos'] / len(capacities) / days if capacities else 0.0,
+            'utilizacion': totals['horas_plaza'] / available * 100 if available else 0.0,
+        })
+
+    # Ventanas [start, end) servidas por los agregados diarios: O(días)
+    def daily_totals(self, start, end):
+        with self._lock:
+            return self._rollup.daily_totals(start, end)
+
+    def window_weekday_hour_covers(self, start, end):
+        with self._lock:
+            return self._rollup.weekday_hour_covers(start, end)
+
+    def table_totals(self, start, end):
+        with self._lock:
+            return self._rollup.table_totals(start, end)
+
+    def hourly_history(self, start, end):
+        with self._lock:
+            return self._rollup.hourly_matrix(start, end)
+
+    def party_size_distribution(self, start, end):
+        with self._lock:
+            return self._rollup.party_size_distribution(start, end)
+
+    def status_counts(self):
+        with self._lock:
+            return self._rollup.status_totals()
+
+    def hourly_bookings(self, day):
+        with self._lock:
+            return self._rollup.hourly_bookings(day)
+
+    # --- Escrituras ---
+
+    def _set_value(self, reservation_id, column, value):
+        if reservation_id in self._pending:
+            self._pending[reservation_id][column] = value
+            return
+        self._reservations.at[reservation_id, column] = value
+
+    def add_reservation(self, reservation):
+        row = {column: coerce_reservation_value(column, reservation[column]) for column in RESERVATION_COLUMNS[1:]}
+        with self._lock, self._conn:
+            new_id = self._allocate_id()
+            self._conn.execute(
+                f"INSERT INTO reservas ({', '.join(RESERVATION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (new_id, row['nombre'], row['telefono'], to_epoch(row['fecha']), row['comensales'],
+                 row['mesa'] if pd.notna(row['mesa']) else None, row['estado'], row['notas'])
+            )
+            self._queue_behind_sweep([new_id], [to_epoch(row['fecha'])])
+            self._pending[new_id] = {'id': new_id, **row, 'version': 1}
+            self._day_index.add(new_id, row['fecha'])
+            self._rollup.add(row)
+            self._search_index.add(new_id, row)
+            self._table_intervals.add(new_id, row)
+            self._maybe_flush()
+            self._bump_version("reserva", new_id)
+            return new_id
+
+    def update_reservation(self, reservation_id, changes, expected_version=None):
+        reservation_id = int(reservation_id)
+        changes = {column: coerce_reservation_value(column, value) for column, value in changes.items()}
+        values = dict(changes)
+        if 'fecha' in values:
+            values['fecha'] = to_epoch(values['fecha'])
+        if 'mesa' in values:
+            values['mesa'] = values['mesa'] if pd.notna(values['mesa']) else None
+
+        assignments = ", ".join(f"{column} = ?" for column in values)
+        with self._lock, self._conn:
+            if not self._exists(reservation_id):
+                raise KeyError(reservation_id)
+            old_row = self._row(reservation_id)
+            row_version = int(old_row['version'])
+            if expected_version is not None and int(expected_version) != row_version:
+                raise ConcurrentModificationError(
+                    f"La reserva {reservation_id} cambió (versión {row_version}, se esperaba {expected_version})"
+                )
+            cursor = self._conn.execute(
+                f"UPDATE reservas SET {assignments}, version = version + 1 WHERE id = ? AND version = ?",
+                (*values.values(), reservation_id, row_version)
+            )
+            if cursor.rowcount == 0:
+                raise ConcurrentModificationError(f"La reserva {reservation_id} cambió en la base de datos")
+            self._queue_behind_sweep([reservation_id], [values.get('fecha', to_epoch(old_row['fecha']))])
+            self._apply_changes(reservation_id, old_row, {**changes, 'version': row_version + 1})
+            self._bump_version("reserva", reservation_id)
+
+    def _apply_changes(self, reservation_id, old_row, changes):
+        # Lleva a la copia en memoria y a los índices un cambio ya escrito en la base
+        for column, value in changes.items():
+            self._set_value(reservation_id, column, value)
+        if 'fecha' in changes:
+            self._day_index.move(reservation_id, old_row['fecha'], changes['fecha'])
+        new_row = self._row(reservation_id)
+        self._rollup.remove(old_row)
+        self._rollup.add(new_row)
+        self._search_index.update(reservation_id, old_row, new_row)
+        self._table_intervals.remove(reservation_id, old_row)
+        self._table_intervals.add(reservation_id, new_row)
+
+    def update_reservation_statuses(self, updates):
+        # Cambios de estado en lote, como (id, estado, versión leída), en una
+        # sola transacción y con un único incremento de `version`. Las filas
+        # que otra sesión cambió desde que se leyeron se omiten. Devuelve los
+        # ids actualizados.
+        updated = []
+        with self._lock, self._conn:
+            for reservation_id, estado, expected_version in updates:
+                reservation_id, expected_version = int(reservation_id), int(expected_version)
+                estado = coerce_reservation_value('estado', estado)
+                if not self._exists(reservation_id):
+                    continue
+                cursor = self._conn.execute(
+                    "UPDATE reservas SET estado = ?, version = version + 1 WHERE id = ? AND version = ?",
+                    (estado, reservation_id, expected_version)
+                )
+                if cursor.rowcount == 0:
+                    continue
+                old_row = self._row(reservation_id)
+                self._apply_changes(reservation_id, old_row, {'estado': estado, 'version': expected_version + 1})
+                updated.append(reservation_id)
+            if updated:
+                self._bump_version("reserva", None)
+        return updated
+
+    def delete_reservation(self, reservation_id):
+        reservation_id = int(reservation_id)
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM reservas WHERE id = ?", (reservation_id,))
+            if self._exists(reservation_id):
+                old_row = self._row(reservation_id)
+                self._day_index.remove(reservation_id, old_row['fecha'])
+                self._rollup.remove(old_row)
+                self._search_index.remove(reservation_id, old_row)
+                self._table_intervals.remove(reservation_id, old_row)
+                if self._pending.pop(reservation_id, None) is None:
+                    self._tombstones.add(reservation_id)
+                    self._maybe_compact()
+            self._bump_version("reserva", reservation_id)
+
+    def bulk_insert_reservations(self, df):
+        # Columnas convertidas de una vez a tipos de Python, sin recorrer filas
+        _check_range('comensales', df['comensales'], low=1)
+        _check_range('mesa', df['mesa'])
+        ids = df['id'].astype(int).tolist()
+        fechas = df['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64).tolist()
+        records = zip(
+            ids, df['nombre'].tolist(), df['telefono'].tolist(), fechas,
+            df['comensales'].astype(int).tolist(),
+            [int(mesa) if pd.notna(mesa) else None for mesa in df['mesa'].tolist()],
+            df['estado'].astype(str).tolist(), df['notas'].astype(str).tolist()
+        )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO reservas ({', '.join(RESERVATION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                records
+            )
+            self._queue_behind_sweep(ids, fechas)
+        self._load_reservations()
+        self._init_sequence()
+
+    def import_reservations(self, chunks):
+        # Importación masiva por bloques de reservas ya validadas: cada bloque
+        # recibe ids nuevos de la secuencia y se inserta en su propia
+        # transacción, de modo que solo un bloque está en memoria a la vez.
+        # Los índices en memoria se reconstruyen una única vez al final.
+        imported = 0
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            # Un valor que no cabe en la copia en memoria no llega a la base
+            _check_range('comensales', chunk['comensales'], low=1)
+            _check_range('mesa', chunk['mesa'])
+            fechas = chunk['fecha'].to_numpy(dtype='datetime64[s]').astype(np.int64).tolist()
+            mesas = [int(mesa) if pd.notna(mesa) else None for mesa in chunk['mesa'].tolist()]
+            with self._lock, self._conn:
+                first_id = self._allocate_ids(len(chunk))
+                self._conn.executemany(
+                    f"INSERT INTO reservas ({', '.join(RESERVATION_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    zip(range(first_id, first_id + len(chunk)), chunk['nombre'].tolist(), chunk['telefono'].tolist(),
+                        fechas, chunk['comensales'].astype(int).tolist(), mesas,
+                        chunk['estado'].tolist(), chunk['notas'].tolist())
+                )
+                self._queue_behind_sweep(range(first_id, first_id + len(chunk)), fechas)
+            imported += len(chunk)
+        if imported:
+            self._load_reservations()
+            self._bump_version("reserva", None)
+        return imported
+
+    def add_table(self, table):
+        with self._lock, self._conn:
+            self._conn.execute(
+                f"INSERT INTO mesas ({', '.join(TABLE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                (int(table['numero']), int(table['capacidad']), table['ubicacion'], table['estado'],
+                 _optional_float(table.get('pos_x')), _optional_float(table.get('pos_y')))
+            )
+            now = to_epoch(datetime.now())
+            self._wait_queue.set_table(table['numero'], table['estado'], now, capacidad=table['capacidad'])
+            self._log_table_event(table['numero'], table['estado'], now)
+            self._bump_version("mesa", int(table['numero']))
+
+    def bulk_insert_tables(self, df):
+        df = df.reindex(columns=TABLE_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO mesas ({', '.join(TABLE_COLUMNS)}) VALUES (?, ?, ?, ?, ?, ?)",
+                [(int(t.numero), int(t.capacidad), t.ubicacion, t.estado,
+                  _optional_float(t.pos_x), _optional_float(t.pos_y))
+                 for t in df.itertuples(index=False)]
+            )
+            self._sync_wait_tables()
+            self._log_table_states(df['numero'].tolist())
+            self._bump_version()
+
+    def import_tables(self, df):
+        # Alta o actualización por número de mesa; el estado se conserva
+        # si la mesa ya existía y el fichero no lo trae
+        df = df.reindex(columns=TABLE_COLUMNS)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"""INSERT INTO mesas ({', '.join(TABLE_COLUMNS)}) VALUES (?, ?, ?, COALESCE(?, 'Libre'), ?, ?)
+                    ON CONFLICT(numero) DO UPDATE SET
+                        capacidad = excluded.capacidad,
+                        ubicacion = excluded.ubicacion,
+                        estado = COALESCE(?, mesas.estado),
+                        pos_x = excluded.pos_x,
+                        pos_y = excluded.pos_y,
+                        version = mesas.version + 1""",
+                [(int(t.numero), int(t.capacidad), t.ubicacion, t.estado if pd.notna(t.estado) else None,
+                  _optional_float(t.pos_x), _optional_float(t.pos_y), t.estado if pd.notna(t.estado) else None)
+                 for t in df.itertuples(index=False)]
+            )
+            self._sync_wait_tables()
+            self._log_table_states(df['numero'].tolist())
+            self._bump_version("mesa", None)
+        return len(df)
+
+    def set_table_status(self, numero, estado, expected_version=None):
+        if numero is None or pd.isna(numero):
+            return
+        sql = "UPDATE mesas SET estado = ?, version = version + 1 WHERE numero = ?"
+        params = [estado, int(numero)]
+        if expected_version is not None:
+            sql += " AND version = ?"
+            params.append(int(expected_version))
+        with self._lock, self._conn:
+            cursor = self._conn.execute(sql, params)
+            if expected_version is not None and cursor.rowcount == 0:
+                raise ConcurrentModificationError(f"La mesa {int(numero)} cambió desde que se leyó")
+            if cursor.rowcount == 0:
+                # Mesa inexistente: nada que anotar ni que avisar
+                return
+            # Solo se actualiza esta mesa en la cola de espera, sin recorrer la sala
+            now = to_epoch(datetime.now())
+            self._wait_queue.set_table(numero, estado, now)
+            self._log_table_event(numero, estado, now)
+            self._bump_version("mesa", int(numero))
+
+    def bulk_insert_table_events(self, df):
+        # Historial de estados ya existente (p. ej. el sintético de la siembra)
+        df = df.sort_values('momento', kind='stable')
+        rows = list(zip(
+            df['mesa'].astype(int).tolist(), df['estado'].astype(str).tolist(),
+            df['momento'].to_numpy(dtype='datetime64[s]').astype(np.int64).tolist(),
+            [int(c) if pd.notna(c) else None for c in df['comensales'].tolist()]
+        ))
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO eventos_mesa ({', '.join(TABLE_EVENT_COLUMNS)}) VALUES (?, ?, ?, ?)", rows
+            )
+        self._load_table_events()
+        self._bump_version("mesa", None)
+
+    # --- Lista de espera ---
+
+    def add_walk_in(self, party):
+        llegada = to_epoch(party.get('llegada') or datetime.now())
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO lista_espera (nombre, telefono, comensales, llegada) VALUES (?, ?, ?, ?)",
+                (party['nombre'], party.get('telefono') or "", int(party['comensales']), llegada)
+            )
+            self._wait_queue.add(cursor.lastrowid, party['comensales'], llegada)
+            self._bump_version("espera", cursor.lastrowid)
+            return cursor.lastrowid
+
+    def remove_walk_in(self, party_id):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM lista_espera WHERE id = ?", (int(party_id),))
+            self._wait_queue.remove(party_id)
+            self._bump_version("espera", int(party_id))
+
+    def seat_walk_in(self, party_id, numero):
+        # Saca el grupo de la lista y ocupa la mesa en la misma transacción;
+        # la mesa queda libre en la cola al cabo del turno de su tamaño de grupo
+        party_id, numero = int(party_id), int(numero)
+        with self._lock, self._conn:
+            rows = self._conn.execute("SELECT comensales FROM lista_espera WHERE id = ?", (party_id,)).fetchall()
+            if not rows:
+                raise KeyError(party_id)
+            cursor = self._conn.execute(
+                "UPDATE mesas SET estado = 'Ocupada', version = version + 1 WHERE numero = ?", (numero,)
+            )
+            if cursor.rowcount == 0:
+                raise KeyError(numero)
+            self._conn.execute("DELETE FROM lista_espera WHERE id = ?", (party_id,))
+            now = to_epoch(datetime.now())
+            self._wait_queue.remove(party_id)
+            self._wait_queue.set_table(numero, "Ocupada", now, comensales=rows[0][0])
+            self._log_table_event(numero, "Ocupada", now, comensales=rows[0][0])
+            self._bump_version("espera", party_id)
+            self._bump_version("mesa", numero)
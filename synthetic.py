@@ -0,0 +1,178 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from analytics import STATUSES, TABLE_STATUSES
+from seating import LOCATIONS
+
+# Generador de datos sintéticos para la siembra inicial, los benchmarks y las
+# pruebas de carga. Cada columna se sortea de una vez con numpy (sin bucles
+# por fila), de modo que millones de reservas se generan en segundos. Los
+# históricos largos reproducen la estacionalidad del año, los picos por día
+# de la semana y hora, el reparto de tamaños de grupo y las cancelaciones.
+
+NAMES = ["García", "Rodríguez", "López", "Martínez", "González", "Pérez", "Sánchez",
+         "Fernández", "Torres", "Ramírez", "Flores", "Díaz", "Morales", "Ruiz"]
+NOTES = ["", "Alergia a frutos secos", "Celebración de cumpleaños",
+         "Prefieren mesa interior", "Solicitan trona para bebé"]
+NOTE_WEIGHTS = [0.7, 0.1, 0.1, 0.05, 0.05]
+
+# Demanda relativa por día de la semana (0 = lunes)
+WEEKDAY_WEIGHTS = [0.6, 0.7, 0.8, 0.95, 1.3, 1.5, 1.15]
+# Franjas de servicio con sus horas punta: 14h en la comida y 21h en la cena
+HOURS = [12, 13, 14, 15, 19, 20, 21, 22]
+HOUR_WEIGHTS = [0.06, 0.16, 0.2, 0.06, 0.05, 0.15, 0.22, 0.1]
+MINUTES = [0, 15, 30, 45]
+# Tamaño de grupo de 1 a 8 personas: sobre todo parejas y grupos de cuatro
+PARTY_SIZE_WEIGHTS = [0.05, 0.38, 0.12, 0.22, 0.08, 0.09, 0.03, 0.03]
+# Amplitud de la estacionalidad anual (máximo a mediados de julio) y
+# refuerzo de las dos últimas semanas de diciembre
+SEASONAL_AMPLITUDE = 0.25
+PEAK_DAY_OF_YEAR = 196
+DECEMBER_BOOST = 1.3
+CANCELLATION_RATE = 0.1
+# Reservas pasadas en las que el grupo no se presentó
+NO_SHOW_RATE = 0.04
+# Reservas con mesa asignada de antemano
+ASSIGNED_TABLE_RATE = 0.8
+# Estados de las reservas futuras que no se cancelan
+UPCOMING_STATUSES = ["Confirmada", "Pendiente"]
+UPCOMING_WEIGHTS = [0.75, 0.25]
+PHONE_TEMPLATE = b"+34 6-- --- ---"
+# Duración del turno: base más unos minutos por comensal, con dispersión
+# multiplicativa; solo se genera historial de estados de los últimos días
+TURN_BASE_MINUTES = 55
+TURN_MINUTES_PER_GUEST = 8
+TURN_SPREAD = 0.2
+MAX_ARRIVAL_DELAY_MINUTES = 10
+TABLE_EVENT_HISTORY_DAYS = 90
+
+
+def day_weights(first_day, days):
+    # Peso de cada día del rango: día de la semana × estación del año
+    dates = pd.date_range(first_day, periods=days, freq='D')
+    weights = np.array(WEEKDAY_WEIGHTS)[dates.weekday]
+    season = np.cos(2 * np.pi * (dates.dayofyear.to_numpy() - PEAK_DAY_OF_YEAR) / 365.25)
+    weights = weights * (1 + SEASONAL_AMPLITUDE * season)
+    weights[(dates.month == 12) & (dates.day >= 18)] *= DECEMBER_BOOST
+    return weights / weights.sum()
+
+
+def generate_tables(n_tables=15, seed=None):
+    rng = np.random.RandomState(seed)
+    # Se repite el reparto de capacidades de la sala original cada 15 mesas
+    slots = np.arange(n_tables) % 15
+    capacities = np.select([slots < 5, slots < 10, slots < 13], [2, 4, 6], default=8)
+    return pd.DataFrame({
+        "numero": np.arange(1, n_tables + 1),
+        "capacidad": capacities,
+        "ubicacion": np.array(LOCATIONS, dtype=object)[rng.randint(0, len(LOCATIONS), n_tables)],
+        "estado": rng.choice(["Libre", "Ocupada", "Reservada"], size=n_tables, p=[0.5, 0.3, 0.2]),
+    })
+
+
+def assign_tables(rng, party_sizes, tables):
+    # Mesa al azar entre las que tienen capacidad suficiente para el grupo
+    # (sin comprobar solapes de turno); sin mesa si el grupo no cabe en
+    # ninguna o si la reserva no la tenía asignada
+    order = np.argsort(tables['capacidad'].to_numpy(), kind='stable')
+    capacities = tables['capacidad'].to_numpy()[order]
+    numbers = tables['numero'].to_numpy()[order]
+    first = np.searchsorted(capacities, party_sizes, side='left')
+    eligible = len(capacities) - first
+    picks = first + (rng.random_sample(len(party_sizes)) * np.maximum(eligible, 1)).astype(np.int64)
+    mesa = pd.array(numbers[np.minimum(picks, len(numbers) - 1)], dtype='Int64')
+    mesa[(eligible == 0) | (rng.random_sample(len(party_sizes)) >= ASSIGNED_TABLE_RATE)] = pd.NA
+    return mesa
+
+
+def phone_numbers(rng, count):
+    # Móviles +34 6XX XXX XXX: se escriben los dígitos sobre una matriz de
+    # bytes con la plantilla y cada fila se lee como un texto de 15 caracteres
+    chars = np.tile(np.frombuffer(PHONE_TEMPLATE, dtype=np.uint8), (count, 1))
+    number = rng.randint(0, 100_000_000, count)
+    positions = [i for i, char in enumerate(PHONE_TEMPLATE) if char == ord("-")]
+    for k, position in enumerate(positions):
+        chars[:, position] = ord("0") + number // 10 ** (len(positions) - 1 - k) % 10
+    return chars.view(f"S{len(PHONE_TEMPLATE)}").ravel().astype(f"U{len(PHONE_TEMPLATE)}")
+
+
+def generate_reservations(n_reservations, tables, days=7, seed=None, now=None):
+    # Reservas repartidas en `days` días: con más de 7 el histórico se
+    # extiende hacia atrás y la última semana queda siempre por delante de
+    # hoy. Las pasadas quedan completadas (o no presentadas) y las futuras
+    # confirmadas o pendientes, salvo la fracción cancelada.
+    rng = np.random.RandomState(seed)
+    now = now or datetime.now()
+    first_day = np.datetime64(now.date() - timedelta(days=days - 7), 'D')
+
+    day_offsets = rng.choice(days, size=n_reservations, p=day_weights(first_day, days))
+    hours = np.array(HOURS)[rng.choice(len(HOURS), size=n_reservations, p=HOUR_WEIGHTS)]
+    minutes = np.array(MINUTES)[rng.randint(0, len(MINUTES), n_reservations)]
+    fecha = (first_day + day_offsets).astype('datetime64[s]') + (hours * 3600 + minutes * 60)
+    party_sizes = rng.choice(np.arange(1, 9), size=n_reservations, p=PARTY_SIZE_WEIGHTS)
+
+    # Estados como códigos de categoría: sin crear un texto por fila
+    codes = np.array([STATUSES.index(estado) for estado in UPCOMING_STATUSES])
+    estado = codes[rng.choice(len(codes), size=n_reservations, p=UPCOMING_WEIGHTS)]
+    past = fecha < np.datetime64(now, 's')
+    estado[past] = STATUSES.index("Completada")
+    estado[past & (rng.random_sample(n_reservations) < NO_SHOW_RATE)] = STATUSES.index("No presentada")
+    estado[rng.random_sample(n_reservations) < CANCELLATION_RATE] = STATUSES.index("Cancelada")
+
+    return pd.DataFrame({
+        "id": np.arange(1, n_reservations + 1),
+        "nombre": pd.Categorical.from_codes(rng.randint(0, len(NAMES), n_reservations), NAMES),
+        "telefono": phone_numbers(rng, n_reservations),
+        "fecha": fecha.astype('datetime64[ns]'),
+        "comensales": party_sizes,
+        "mesa": assign_tables(rng, party_sizes, tables),
+        "estado": pd.Categorical.from_codes(estado, STATUSES),
+        "notas": pd.Categorical.from_codes(rng.choice(len(NOTES), size=n_reservations, p=NOTE_WEIGHTS), NOTES),
+    })
+
+
+def generate_table_events(reservations, seed=None, now=None):
+    # Historial de estados de mesa coherente con las reservas completadas de
+    # los últimos días: la mesa pasa a "Ocupada" al llegar el grupo (con algo
+    # de retraso) y vuelve a "Libre" al acabar su turno
+    rng = np.random.RandomState(seed)
+    now = np.datetime64(now or datetime.now(), 's')
+    fecha = reservations['fecha'].to_numpy(dtype='datetime64[s]')
+    seated = ((reservations['estado'] == "Completada").to_numpy() & reservations['mesa'].notna().to_numpy()
+              & (fecha >= now - np.timedelta64(TABLE_EVENT_HISTORY_DAYS, 'D')))
+
+    fecha = fecha[seated]
+    mesa = reservations['mesa'].to_numpy(dtype=np.int64, na_value=0)[seated]
+    comensales = reservations['comensales'].to_numpy(dtype=np.int64)[seated]
+    arrival = fecha + (rng.random_sample(len(fecha)) * MAX_ARRIVAL_DELAY_MINUTES * 60).astype(np.int64)
+    minutes = (TURN_BASE_MINUTES + TURN_MINUTES_PER_GUEST * comensales) * rng.lognormal(0, TURN_SPREAD, len(fecha))
+    departure = np.minimum(arrival + (minutes * 60).astype(np.int64), now)
+
+    # Las reservas se asignaron sin comprobar solapes: cada turno termina a
+    # más tardar cuando llega el siguiente grupo a la misma mesa
+    order = np.lexsort((arrival, mesa))
+    mesa, comensales, arrival, departure = mesa[order], comensales[order], arrival[order], departure[order]
+    same_table = np.r_[mesa[1:] == mesa[:-1], False]
+    departure = np.where(same_table, np.minimum(departure, np.r_[arrival[1:], now]), departure)
+
+    # Primero las salidas, que no llevan comensales, y después las entradas:
+    # con la ordenación estable, a igual momento un grupo se va antes de que
+    # llegue el siguiente
+    estado = np.repeat([TABLE_STATUSES.index("Libre"), TABLE_STATUSES.index("Ocupada")], len(mesa))
+    party_sizes = pd.array(np.concatenate([comensales, comensales]), dtype='Int64')
+    party_sizes[:len(mesa)] = pd.NA
+    return pd.DataFrame({
+        "mesa": np.concatenate([mesa, mesa]),
+        "estado": pd.Categorical.from_codes(estado, TABLE_STATUSES),
+        "momento": np.concatenate([departure, arrival]).astype('datetime64[ns]'),
+        "comensales": party_sizes,
+    }).sort_values('momento', kind='stable').reset_index(drop=True)
+
+
+def generate_example_data(n_reservations=20, n_tables=15, days=7, seed=None):
+    # `seed` hace la generación reproducible (benchmarks y pruebas de carga)
+    tables = generate_tables(n_tables, seed)
+    reservations = generate_reservations(n_reservations, tables, days, None if seed is None else seed + 1)
+    return reservations, tables
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import ReservationStore
+from synthetic import NAMES, generate_example_data
+
+# Histórico pequeño pero con varios días, mesas y estados
+SEED_RESERVATIONS = 400
+SEED_TABLES = 10
+SEED_DAYS = 21
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ReservationStore(str(tmp_path / "restaurante.db"), example_data=False)
+    reservations, tables = generate_example_data(SEED_RESERVATIONS, SEED_TABLES, SEED_DAYS, seed=7)
+    store.bulk_insert_tables(tables)
+    store.bulk_insert_reservations(reservations)
+    return store
+
+
+def new_reservation(rng, tables, base):
+    return {
+        'nombre': f"{rng.choice(NAMES)} {rng.choice(['Ana', 'Luis', 'Marta', 'Íñigo'])}",
+        'telefono': f"+34 6{rng.randint(10**7, 10**8)}",
+        'fecha': base + timedelta(days=int(rng.randint(-10, 10)), minutes=15 * int(rng.randint(0, 40))),
+        'comensales': int(rng.randint(1, 9)),
+        'mesa': int(rng.choice(tables)) if rng.rand() < 0.8 else None,
+        'estado': str(rng.choice(["Confirmada", "Pendiente", "Completada", "Cancelada", "No presentada"])),
+        'notas': "",
+    }
+
+
+def churn(store, seed=0, steps=300):
+    # Altas, ediciones de todas las columnas y bajas mezcladas, incluidas las
+    # de reservas aún en el búfer de inserciones
+    rng = np.random.RandomState(seed)
+    tables = store.tables()['numero'].tolist()
+    base = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(hours=12)
+    # Los ids se siguen aquí: leer el marco vaciaría el búfer en cada paso
+    ids = store.live_reservations()['id'].tolist()
+    for _ in range(steps):
+        action = rng.rand()
+        if action < 0.4 or not ids:
+            ids.append(store.add_reservation(new_reservation(rng, tables, base)))
+        elif action < 0.8:
+            changes = new_reservation(rng, tables, base)
+            columns = rng.choice(list(changes), size=rng.randint(1, 4), replace=False)
+            store.update_reservation(int(rng.choice(ids)), {column: changes[column] for column in columns})
+        else:
+            store.delete_reservation(ids.pop(rng.randint(len(ids))))
+    return store
+
+
+@pytest.fixture
+def churned_store(store):
+    return churn(store)
+
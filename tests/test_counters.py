@@ -0,0 +1,20 @@
+import numpy as np
+
+from analytics import STATUSES
+
+
+def test_status_counts_match_frame_after_churn(churned_store):
+    live = churned_store.live_reservations()
+    estados = live['estado'].astype(str)
+    counts = churned_store.status_counts()
+    for estado in STATUSES:
+        assert counts.loc[estado, 'reservas'] == (estados == estado).sum()
+        assert counts.loc[estado, 'comensales'] == live.loc[estados == estado, 'comensales'].sum()
+
+
+def test_hourly_bookings_match_frame_after_churn(churned_store):
+    live = churned_store.live_reservations()
+    for day in live['fecha'].dt.date.unique():
+        on_day = live[live['fecha'].dt.date == day]
+        expected = np.bincount(on_day['fecha'].dt.hour, minlength=24)
+        assert (churned_store.hourly_bookings(day) == expected).all()
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+
+from analytics import DailyRollup, day_number
+from indices import INACTIVE_STATUSES
+
+
+def days_covered(*rollups):
+    first = min(rollup.first_day for rollup in rollups)
+    return first, max(rollup.first_day + len(rollup.bookings) for rollup in rollups)
+
+
+def by_table(rollup, array, first, last):
+    # Columnas por número de mesa; el orden de las columnas depende del orden de alta
+    window = rollup._window(array, first, last)
+    return {numero: window[:, slot].tolist() for numero, slot in rollup._table_slots.items() if window[:, slot].any()}
+
+
+def test_daily_rollup_matches_rebuild_after_churn(churned_store):
+    incremental = churned_store._rollup
+    rebuilt = DailyRollup.from_frame(churned_store.live_reservations())
+    first, last = days_covered(incremental, rebuilt)
+
+    for name in ('bookings', 'covers'):
+        assert (incremental._window(getattr(incremental, name), first, last)
+                == rebuilt._window(getattr(rebuilt, name), first, last)).all()
+    for name in ('table_bookings', 'table_covers'):
+        assert (by_table(incremental, getattr(incremental, name), first, last)
+                == by_table(rebuilt, getattr(rebuilt, name), first, last))
+    width = max(incremental.party_bookings.shape[1], rebuilt.party_bookings.shape[1])
+    parties = [np.pad(rollup._window(rollup.party_bookings, first, last),
+                      ((0, 0), (0, width - rollup.party_bookings.shape[1])))
+               for rollup in (incremental, rebuilt)]
+    assert (parties[0] == parties[1]).all()
+
+
+def test_daily_totals_match_frame(churned_store):
+    live = churned_store.live_reservations()
+    start, end = live['fecha'].min().normalize(), live['fecha'].max().normalize() + pd.Timedelta(days=1)
+    totals = churned_store.daily_totals(start, end)
+    assert len(totals) == day_number(end) - day_number(start)
+
+    active = live[~live['estado'].isin(INACTIVE_STATUSES)]
+    days = totals.index
+    expected = active.groupby(active['fecha'].dt.normalize()).agg(reservas=('id', 'size'), comensales=('comensales', 'sum'))
+    expected = expected.reindex(days, fill_value=0)
+    assert totals['reservas'].tolist() == expected['reservas'].tolist()
+    assert totals['comensales'].tolist() == expected['comensales'].tolist()
+    cancelled = live[live['estado'] == "Cancelada"].groupby(live['fecha'].dt.normalize()).size()
+    assert totals['cancelaciones'].tolist() == cancelled.reindex(days, fill_value=0).tolist()
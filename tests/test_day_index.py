@@ -0,0 +1,18 @@
+import pandas as pd
+
+from indices import DayIndex
+
+
+def test_day_index_matches_rebuild_after_churn(churned_store):
+    rebuilt = DayIndex.from_frame(churned_store.live_reservations())
+    assert churned_store._day_index._days == rebuilt._days
+    assert churned_store._day_index._entries == rebuilt._entries
+
+
+def test_day_slices_match_frame(churned_store):
+    live = churned_store.live_reservations()
+    for day in live['fecha'].dt.normalize().unique():
+        expected = live[(live['fecha'] >= day) & (live['fecha'] < day + pd.Timedelta(days=1))]
+        got = churned_store.reservations_for_day(day.date())
+        assert sorted(got['id']) == sorted(expected['id'])
+        assert got['fecha'].is_monotonic_increasing
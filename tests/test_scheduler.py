@@ -0,0 +1,97 @@
+from datetime import timedelta
+
+import pandas as pd
+import pytest
+
+from scheduler import ACTIVE_STATUSES, NO_SHOW_GRACE_MINUTES, SWEEP_WATERMARK, sweep_due, sweep_window
+from storage import ConcurrentModificationError, to_epoch
+
+NOW = pd.Timestamp.now().floor('min')
+
+
+def snapshot(store):
+    reservations = store.live_reservations().sort_values('id').reset_index(drop=True)
+    return reservations, store.tables()
+
+
+def past_reservation(store, hours_ago, estado="Confirmada"):
+    return {'nombre': "Ruiz", 'telefono': "600111222", 'fecha': NOW - timedelta(hours=hours_ago), 'comensales': 2,
+            'mesa': int(store.tables()['numero'].iloc[0]), 'estado': estado, 'notas': ""}
+
+
+def test_resweep_changes_nothing(store):
+    store.add_reservation(past_reservation(store, 3))
+    store.add_reservation({**past_reservation(store, 3), 'mesa': None})
+    first = sweep_due(store, NOW)
+    assert first['completadas'] + first['no_presentadas'] > 0
+    reservations, tables = snapshot(store)
+    version = store.version
+
+    again = sweep_due(store, NOW)
+    assert (again['revisadas'], again['completadas'], again['no_presentadas'], again['mesas_liberadas']) == (0, 0, 0, 0)
+    _, estados, released = sweep_window(store, NOW - timedelta(days=30), NOW)
+    assert estados == [] and released == []
+    pd.testing.assert_frame_equal(snapshot(store)[0], reservations)
+    pd.testing.assert_frame_equal(snapshot(store)[1], tables)
+    assert store.version == version
+
+
+def test_sweep_leaves_no_due_reservation_active(store):
+    for hours_ago in (1, 3, 24 * 3):
+        store.add_reservation(past_reservation(store, hours_ago))
+    sweep_due(store, NOW)
+    live = store.live_reservations()
+    due = live['fecha'] <= NOW - timedelta(minutes=NO_SHOW_GRACE_MINUTES)
+    assert not live.loc[due, 'estado'].isin(ACTIVE_STATUSES).any()
+    assert store.sequence_value(SWEEP_WATERMARK) == to_epoch(NOW)
+
+
+def test_writes_behind_the_watermark_are_swept_next_time(store):
+    sweep_due(store, NOW)
+    added = store.add_reservation(past_reservation(store, 3))
+    edited = store.add_reservation(past_reservation(store, 5, estado="Completada"))
+    store.update_reservation(edited, {'estado': "Pendiente"})
+    imported = store.import_reservations([pd.DataFrame([past_reservation(store, 24 * 40)])])
+    recent = store.add_reservation(past_reservation(store, 0))
+
+    result = sweep_due(store, NOW + timedelta(minutes=1))
+    assert imported == 1
+    assert result['no_presentadas'] == 3
+    assert store.get_reservation(added)['estado'] == "No presentada"
+    assert store.get_reservation(edited)['estado'] == "No presentada"
+    assert store.get_reservation(recent)['estado'] == "Confirmada"
+    assert sweep_due(store, NOW + timedelta(minutes=2))['no_presentadas'] == 0
+
+
+def test_stale_reservation_version_is_rejected(store):
+    reservation_id = store.add_reservation(past_reservation(store, -2))
+    read = store.get_reservation(reservation_id)
+    store.update_reservation(reservation_id, {'comensales': 4}, expected_version=read['version'])
+    with pytest.raises(ConcurrentModificationError):
+        store.update_reservation(reservation_id, {'comensales': 6}, expected_version=read['version'])
+    assert store.get_reservation(reservation_id)['comensales'] == 4
+
+
+def test_status_batch_skips_rows_changed_since_read(store):
+    first = store.add_reservation(past_reservation(store, 4))
+    second = store.add_reservation(past_reservation(store, 4))
+    versions = {reservation_id: store.get_reservation(reservation_id)['version'] for reservation_id in (first, second)}
+    # Otra sesión edita la primera entre la lectura y la escritura del lote
+    store.update_reservation(first, {'estado': "Cancelada"})
+
+    updated = store.update_reservation_statuses(
+        [(reservation_id, "No presentada", version) for reservation_id, version in versions.items()]
+    )
+    assert updated == [second]
+    assert store.get_reservation(first)['estado'] == "Cancelada"
+    assert store.get_reservation(second)['estado'] == "No presentada"
+
+
+def test_stale_table_version_is_rejected(store):
+    table = store.tables().iloc[0]
+    store.set_table_status(table['numero'], "Reservada", expected_version=table['version'])
+    version = store.version
+    with pytest.raises(ConcurrentModificationError):
+        store.set_table_status(table['numero'], "Libre", expected_version=table['version'])
+    assert store.version == version
+    assert store.tables().iloc[0]['estado'] == "Reservada"
@@ -0,0 +1,48 @@
+import pytest
+
+from indices import SearchIndex, fold_text, phone_digits
+
+QUERIES = ["garcía", "GARCIA", "ga", "g", "m", "ana", "lópez marta", "612", "+34 6", "34", "zzz"]
+
+
+def brute_force_ranks(live, text):
+    # Mejor rango de cada reserva recorriendo el marco entero
+    query, digits = fold_text(text).strip(), phone_digits(text)
+    ranks = {}
+    for reservation in live.itertuples(index=False):
+        name, phone = fold_text(reservation.nombre), phone_digits(reservation.telefono)
+        found = []
+        if query and (query in name if len(query) >= 3 else any(word.startswith(query) for word in name.split())):
+            found.append(0 if name == query else 1 if name.startswith(query) else 2 if f" {query}" in name else 3)
+        if len(digits) >= 3 and digits in phone:
+            found.append(0 if phone == digits else 1 if phone.startswith(digits) else 2 if phone.endswith(digits) else 3)
+        if found:
+            ranks[reservation.id] = (min(found), -reservation.fecha.value, reservation.id)
+    return ranks
+
+
+def test_search_index_matches_rebuild_after_churn(churned_store):
+    rebuilt = SearchIndex.from_frame(churned_store.live_reservations())
+    index = churned_store._search_index
+    for incremental, fresh in ((index._names, rebuilt._names), (index._phones, rebuilt._phones)):
+        assert incremental.ids == fresh.ids
+        assert incremental._postings == fresh._postings
+        assert incremental._prefixes == fresh._prefixes
+
+
+@pytest.mark.parametrize("text", QUERIES)
+def test_search_ranks_and_orders_like_a_full_scan(churned_store, text):
+    ranks = brute_force_ranks(churned_store.live_reservations(), text)
+    total, page = churned_store._search_index.search(text)
+    assert total == len(ranks)
+    assert [reservation_id for _, reservation_id in page] == sorted(ranks, key=ranks.get)
+    assert [rank for rank, _ in page] == [ranks[reservation_id][0] for _, reservation_id in page]
+
+
+@pytest.mark.parametrize("text", ["garcía", "a", "6"])
+def test_search_pages_concatenate_to_the_full_result(churned_store, text):
+    total, everything = churned_store.search(text)
+    pages = [churned_store.search(text, limit=7, offset=offset)[1] for offset in range(0, total + 7, 7)]
+    assert all(churned_store.search(text, limit=7, offset=offset)[0] == total for offset in (0, 7))
+    assert sum((page['id'].tolist() for page in pages), []) == everything['id'].tolist()
+    assert churned_store.search(text, limit=0)[1].empty
@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+
+from analytics import TABLE_STATUSES, TableEventLog
+
+START = 1_760_000_000
+
+
+def random_events(seed=0, count=500, tables=6):
+    # Cambios de estado en orden de tiempo, con repeticiones del mismo estado
+    # y comensales solo en algunas entradas a "Ocupada"
+    rng = np.random.RandomState(seed)
+    moments = START + np.cumsum(rng.randint(1, 40 * 60, size=count))
+    rows = []
+    for momento in moments.tolist():
+        estado = str(rng.choice(TABLE_STATUSES, p=[0.45, 0.4, 0.15]))
+        comensales = int(rng.randint(1, 9)) if estado == "Ocupada" and rng.rand() < 0.7 else None
+        rows.append((int(rng.randint(1, tables + 1)), estado, momento, comensales))
+    return rows
+
+
+def test_appended_log_matches_log_loaded_from_rows():
+    rows = random_events()
+    appended = TableEventLog()
+    for row in rows:
+        appended.append(*row)
+    loaded = TableEventLog.from_rows(rows)
+
+    assert len(appended) == len(loaded)
+    assert appended._open == loaded._open
+    assert appended._starts == loaded._starts
+    assert appended._turn_totals == loaded._turn_totals
+    start, end = pd.Timestamp(START, unit='s'), pd.Timestamp(rows[-1][2] + 1, unit='s')
+    pd.testing.assert_frame_equal(appended.turn_times(start, end), loaded.turn_times(start, end))
+    for numero in range(1, 7):
+        assert appended.open_turn(numero) == loaded.open_turn(numero)
+        assert appended.open_turn_size(numero) == loaded.open_turn_size(numero)
+
+
+def test_store_event_log_matches_reload(store):
+    numeros = store.tables()['numero'].tolist()
+    for step, numero in enumerate(numeros * 3):
+        store.set_table_status(numero, TABLE_STATUSES[step % len(TABLE_STATUSES)])
+    party_id = store.add_walk_in({'nombre': "Ruiz", 'comensales': 3})
+    store.seat_walk_in(party_id, numeros[0])
+
+    rows = store._query("SELECT mesa, estado, momento, comensales FROM eventos_mesa ORDER BY id")
+    loaded = TableEventLog.from_rows(rows)
+    assert store._table_events._open == loaded._open
+    assert store._table_events._starts == loaded._starts
+    assert store._table_events._turn_totals == loaded._turn_totals
+    assert store._table_events.open_turn_size(numeros[0]) == 3
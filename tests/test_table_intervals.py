@@ -0,0 +1,23 @@
+import pandas as pd
+
+from indices import INACTIVE_STATUSES, TableIntervalIndex
+from seating import DEFAULT_TURN_MINUTES
+
+TURN = pd.Timedelta(minutes=DEFAULT_TURN_MINUTES)
+
+
+def test_table_intervals_match_rebuild_after_churn(churned_store):
+    rebuilt = TableIntervalIndex.from_frame(churned_store.live_reservations(), int(TURN.total_seconds()))
+    # Una mesa que se queda sin turnos conserva su lista vacía
+    incremental = {mesa: entries for mesa, entries in churned_store._table_intervals._entries.items() if entries}
+    assert incremental == rebuilt._entries
+
+
+def test_available_tables_match_overlap_scan(churned_store):
+    live = churned_store.live_reservations()
+    occupying = live[live['mesa'].notna() & ~live['estado'].isin(INACTIVE_STATUSES)]
+    numeros = churned_store.tables()['numero'].tolist()
+    for start in occupying['fecha'].sample(20, random_state=1).tolist() + [pd.Timestamp.now().floor('h')]:
+        end = start + TURN
+        busy = set(occupying.loc[(occupying['fecha'] < end) & (occupying['fecha'] + TURN > start), 'mesa'].astype(int))
+        assert churned_store.available_tables(start) == [numero for numero in numeros if numero not in busy]
@@ -0,0 +1,72 @@
+import numpy as np
+
+from storage import ReservationStore, to_epoch
+from waitlist import WaitQueue
+
+NOW = 1_760_000_000
+
+
+def test_incremental_queue_matches_queue_built_from_final_state():
+    rng = np.random.RandomState(3)
+    queue = WaitQueue()
+    tables, parties = {}, {}
+    for step in range(400):
+        moment = NOW + step * 30
+        action = rng.rand()
+        if action < 0.4:
+            parties[step] = (int(rng.randint(1, 9)), moment)
+            queue.add(step, *parties[step])
+        elif action < 0.55 and parties:
+            party_id = list(parties)[rng.randint(len(parties))]
+            del parties[party_id]
+            queue.remove(party_id)
+        else:
+            numero = int(rng.randint(1, 9))
+            capacidad = tables.get(numero, (2 * (1 + numero % 4),))[0]
+            estado = str(rng.choice(["Libre", "Ocupada", "Reservada"]))
+            queue.set_table(numero, estado, moment, capacidad=capacidad)
+            if numero not in tables or tables[numero][1] != estado:
+                tables[numero] = (capacidad, estado, moment)
+        if step % 50 == 0:
+            queue.set_turn_times({size: 3000 + 300 * size for size in range(1, 9)})
+            queue.estimates(moment)
+
+    fresh = WaitQueue()
+    fresh.set_turn_times({size: 3000 + 300 * size for size in range(1, 9)})
+    for party_id, (comensales, llegada) in sorted(parties.items(), key=lambda item: item[1][1]):
+        fresh.add(party_id, comensales, llegada)
+    for numero, (capacidad, estado, moment) in tables.items():
+        fresh.set_table(numero, estado, moment, capacidad=capacidad)
+
+    now = NOW + 400 * 30
+    assert queue.estimates(now) == fresh.estimates(now)
+    assert len(queue) == len(parties)
+
+
+def test_estimates_follow_the_clock_without_resimulating():
+    queue = WaitQueue(turn_minutes=60)
+    queue.set_table(1, "Ocupada", NOW, capacidad=4)
+    queue.add(10, 2, NOW)
+    assert queue.estimates(NOW) == {10: 3600}
+    simulated = queue._estimates
+    assert queue.estimates(NOW + 600) == {10: 3000}
+    assert queue.estimates(NOW + 7200) == {10: 0}
+    assert queue._estimates is simulated
+
+    queue.add(11, 2, NOW + 60)
+    assert queue._estimates is None
+    assert queue.estimates(NOW + 600) == {10: 3000, 11: 6600}
+
+
+def test_store_queue_matches_reopened_store(store):
+    numeros = store.tables()['numero'].tolist()
+    parties = [store.add_walk_in({'nombre': f"Grupo {size}", 'comensales': size}) for size in (2, 4, 2, 6, 3)]
+    store.seat_walk_in(parties[0], numeros[0])
+    store.remove_walk_in(parties[2])
+    store.set_table_status(numeros[1], "Ocupada")
+    store.set_table_status(numeros[2], "Reservada")
+    store.set_table_status(numeros[3], "Libre")
+
+    reopened = ReservationStore(store.path, example_data=False)
+    now = to_epoch("now") + 3600
+    assert store._wait_queue.estimates(now) == reopened._wait_queue.estimates(now)
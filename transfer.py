@@ -0,0 +1,214 @@
+import io
+import zipfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from openpyxl import Workbook, load_workbook
+from openpyxl.utils.exceptions import InvalidFileException
+
+from analytics import STATUSES
+from seating import LOCATIONS
+from storage import MAX_PARTY_SIZE, RESERVATION_COLUMNS, TABLE_COLUMNS, TABLE_STATUSES
+
+# Filas por bloque al leer ficheros de importación
+IMPORT_CHUNK_ROWS = 50_000
+# Límite de filas de una hoja de Excel (incluida la cabecera)
+EXCEL_MAX_ROWS = 1_048_576
+IMPORT_FORMATS = ["csv", "xlsx", "parquet"]
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "Parquet (por mes)": ("zip", "application/zip"),
+}
+
+REQUIRED_RESERVATION_COLUMNS = ["nombre", "telefono", "fecha", "comensales"]
+REQUIRED_TABLE_COLUMNS = ["numero", "capacidad", "ubicacion"]
+
+
+class ImportSchemaError(Exception):
+    # El fichero no tiene el formato o las columnas esperadas
+    pass
+
+
+def _extension(filename):
+    return filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+
+
+def read_chunks(source, filename, chunk_rows=IMPORT_CHUNK_ROWS):
+    # Lee el fichero por bloques de `chunk_rows` filas sin cargarlo entero:
+    # CSV con el lector por bloques de pandas, Excel con openpyxl en modo
+    # solo lectura y Parquet por lotes de pyarrow. Un fichero que no se puede
+    # interpretar se informa como ImportSchemaError.
+    try:
+        yield from _read_chunks(source, filename, chunk_rows)
+    except (ValueError, KeyError, zipfile.BadZipFile, InvalidFileException, pa.ArrowException) as error:
+        raise ImportSchemaError(f"No se pudo leer {filename}: {error}") from error
+
+
+def _read_chunks(source, filename, chunk_rows):
+    extension = _extension(filename)
+    if extension == "csv":
+        yield from pd.read_csv(source, chunksize=chunk_rows, dtype=str, keep_default_na=False)
+    elif extension == "xlsx":
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = [str(value).strip() if value is not None else "" for value in next(rows, ())]
+            width = len(header)
+            batch = []
+            for row in rows:
+                # El modo solo lectura omite las celdas vacías del final de la fila
+                batch.append(row[:width] + (None,) * (width - len(row)))
+                if len(batch) == chunk_rows:
+                    yield pd.DataFrame(batch, columns=header)
+                    batch = []
+            if batch:
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+    elif extension == "parquet":
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+    else:
+        raise ImportSchemaError(f"Formato no admitido: {filename} (se aceptan {', '.join(IMPORT_FORMATS)})")
+
+
+def _normalize_columns(chunk, required):
+    chunk = chunk.rename(columns=lambda column: str(column).strip().lower())
+    missing = [column for column in required if column not in chunk.columns]
+    if missing:
+        raise ImportSchemaError(f"Faltan columnas obligatorias: {', '.join(missing)}")
+    return chunk
+
+
+def _text(series):
+    return series.astype("string").fillna("").str.strip()
+
+
+def validate_reservations(chunk, table_numbers):
+    # Normaliza un bloque al esquema de reservas. Devuelve las filas válidas y
+    # el número de filas descartadas (fecha no válida, comensales fuera de
+    # 1..MAX_PARTY_SIZE, mesa que no existe, nombre vacío o estado
+    # desconocido). El id del fichero se ignora: cada reserva importada
+    # recibe uno nuevo.
+    chunk = _normalize_columns(chunk, REQUIRED_RESERVATION_COLUMNS)
+    df = pd.DataFrame({
+        'nombre': _text(chunk['nombre']),
+        'telefono': _text(chunk['telefono']).str.removesuffix(".0"),
+        'fecha': pd.to_datetime(chunk['fecha'], errors='coerce', format='mixed'),
+        'comensales': pd.to_numeric(chunk['comensales'], errors='coerce'),
+        'mesa': pd.to_numeric(chunk['mesa'], errors='coerce') if 'mesa' in chunk else np.nan,
+        'estado': _text(chunk['estado']) if 'estado' in chunk else "Pendiente",
+        'notas': _text(chunk['notas']) if 'notas' in chunk else "",
+    })
+    df['estado'] = df['estado'].replace("", "Pendiente")
+
+    valid = (
+        (df['nombre'] != "") &
+        df['fecha'].notna() &
+        df['comensales'].between(1, MAX_PARTY_SIZE) & (df['comensales'] % 1 == 0) &
+        df['estado'].isin(STATUSES)
+    )
+    valid &= df['mesa'].isna() | df['mesa'].isin(table_numbers)
+    return df[valid].reset_index(drop=True), int((~valid).sum())
+
+
+def validate_tables(chunk):
+    chunk = _normalize_columns(chunk, REQUIRED_TABLE_COLUMNS)
+    df = pd.DataFrame({
+        'numero': pd.to_numeric(chunk['numero'], errors='coerce'),
+        'capacidad': pd.to_numeric(chunk['capacidad'], errors='coerce'),
+        'ubicacion': _text(chunk['ubicacion']),
+        'estado': _text(chunk['estado']).replace("", pd.NA) if 'estado' in chunk else pd.NA,
+        'pos_x': pd.to_numeric(chunk['pos_x'], errors='coerce') if 'pos_x' in chunk else np.nan,
+        'pos_y': pd.to_numeric(chunk['pos_y'], errors='coerce') if 'pos_y' in chunk else np.nan,
+    })
+    valid = (
+        df['numero'].between(1, np.iinfo(np.int16).max) & (df['numero'] % 1 == 0) &
+        df['capacidad'].between(1, MAX_PARTY_SIZE) & (df['capacidad'] % 1 == 0) &
+        df['ubicacion'].isin(LOCATIONS) &
+        (df['estado'].isna() | df['estado'].isin(TABLE_STATUSES))
+    )
+    return df[valid].reset_index(drop=True), int((~valid).sum())
+
+
+def import_reservations(store, source, filename, chunk_rows=IMPORT_CHUNK_ROWS):
+    # Devuelve (importadas, descartadas)
+    rejected = 0
+    table_numbers = store.tables()['numero'].tolist()
+
+    def valid_chunks():
+        nonlocal rejected
+        for chunk in read_chunks(source, filename, chunk_rows):
+            valid, invalid = validate_reservations(chunk, table_numbers)
+            rejected += invalid
+            yield valid
+
+    imported = store.import_reservations(valid_chunks())
+    return imported, rejected
+
+
+def import_tables(store, source, filename):
+    # Las mesas son pocas: se validan por bloques y se guardan de una vez
+    parts, rejected = [], 0
+    for chunk in read_chunks(source, filename):
+        valid, invalid = validate_tables(chunk)
+        parts.append(valid)
+        rejected += invalid
+    tables = pd.concat(parts, ignore_index=True).drop_duplicates('numero', keep='last') if parts else None
+    imported = store.import_tables(tables) if tables is not None and not tables.empty else 0
+    return imported, rejected
+
+
+def _excel_bytes(df, sheet_name):
+    if len(df) + 1 > EXCEL_MAX_ROWS:
+        raise ValueError(f"Excel admite como máximo {EXCEL_MAX_ROWS - 1} filas; use CSV o Parquet")
+    # Libro en modo solo escritura: las filas se vuelcan sin mantener celdas en memoria
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(sheet_name)
+    sheet.append(list(df.columns))
+    for row in df.astype(object).where(df.notna(), None).itertuples(index=False):
+        sheet.append(row)
+    buffer = io.BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def _parquet_by_month(df):
+    # Conjunto Parquet particionado al estilo Hive (mes=AAAA-MM/), ordenado
+    # por fecha dentro de cada partición, empaquetado en un zip
+    buffer = io.BytesIO()
+    months = df['fecha'].dt.strftime("%Y-%m")
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        for month, part in df.groupby(months, sort=True):
+            part_buffer = io.BytesIO()
+            part.to_parquet(part_buffer, index=False)
+            archive.writestr(f"reservas/mes={month}/part-0.parquet", part_buffer.getvalue())
+    return buffer.getvalue()
+
+
+def export_reservations(store, start, end, file_format):
+    # Rango [start, end) servido por el índice por día del repositorio
+    df = store.reservations_between(start, end)[RESERVATION_COLUMNS]
+    df = df.sort_values(['fecha', 'id'], kind='stable').reset_index(drop=True)
+    if file_format == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if file_format == "xlsx":
+        return _excel_bytes(df, "Reservas")
+    return _parquet_by_month(df)
+
+
+def export_tables(store, file_format):
+    df = store.tables()[TABLE_COLUMNS]
+    if file_format == "csv":
+        return df.to_csv(index=False).encode("utf-8")
+    if file_format == "xlsx":
+        return _excel_bytes(df, "Mesas")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_STORED) as archive:
+        part_buffer = io.BytesIO()
+        df.to_parquet(part_buffer, index=False)
+        archive.writestr("mesas/part-0.parquet", part_buffer.getvalue())
+    return buffer.getvalue()
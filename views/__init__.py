@@ -0,0 +1 @@
+# Páginas de la aplicación; app.py importa cada una al abrirla
@@ -0,0 +1,350 @@
+from datetime import datetime, timedelta
+
+import plotly.express as px
+import plotly.graph_objects as go
+import streamlit as st
+
+from forecasting import FORECAST_DAYS, staff_summary
+from views.common import get_aggregates, get_forecasts, get_profiler, get_store, show_chart, timed
+
+ANALYSIS_WINDOWS = {"Últimos 7 días": 7, "Últimos 30 días": 30, "Últimos 365 días": 365}
+YEAR_OVER_YEAR_DAYS = 364
+WEEKDAY_NAMES = ['Lunes', 'Martes', 'Miércoles', 'Jueves', 'Viernes', 'Sábado', 'Domingo']
+ROTATION_DAYS = 30
+# Resolución de la serie de ocupación según la longitud del periodo
+OCCUPANCY_MINUTE_MAX_DAYS = 2
+OCCUPANCY_HOURLY_MAX_DAYS = 31
+
+@timed("analisis")
+def show_analysis(selected_date):
+    store, aggregates, forecasts, profiler = get_store(), get_aggregates(), get_forecasts(), get_profiler()
+    st.markdown("<div class='title'>Análisis de Datos</div>", unsafe_allow_html=True)
+    
+    period_analysis()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Métricas de Rendimiento</div>", unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    
+    status_counts = aggregates.get('status_counts')
+    
+    with col1:
+        completed = status_counts['reservas'].get("Completada", 0)
+        cancelled = status_counts['reservas'].get("Cancelada", 0)
+        total = status_counts['reservas'].sum()
+        
+        conversion_rate = completed / total * 100 if total > 0 else 0
+        cancellation_rate = cancelled / total * 100 if total > 0 else 0
+        
+        st.metric(
+            "Tasa de Conversión",
+            f"{conversion_rate:.1f}%",
+            delta=f"-{cancellation_rate:.1f}%" if cancellation_rate > 0 else None,
+            delta_color="inverse"
+        )
+    
+    with col2:
+        avg_party_size = status_counts['comensales'].sum() / total if total > 0 else 0
+        st.metric("Promedio Comensales", f"{avg_party_size:.1f}")
+    
+    with col3:
+        # Turnos reales por mesa y día, del registro de cambios de estado
+        tomorrow = datetime.combine(datetime.now().date(), datetime.min.time()) + timedelta(days=1)
+        utilization = aggregates.get('table_utilization', tomorrow - timedelta(days=ROTATION_DAYS), tomorrow)
+        st.metric(
+            "Índice de Rotación", f"{utilization['rotacion']:.2f}x",
+            help=f"Turnos por mesa y día en los últimos {ROTATION_DAYS} días"
+        )
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Recomendaciones</div>", unsafe_allow_html=True)
+    
+    # La previsión se calcula en segundo plano; aquí solo se lee la última y,
+    # si hubo escrituras desde entonces, se pide recalcularla sin esperar
+    forecast = forecasts.get()
+    if forecasts.computed_version != store.version:
+        forecasts.request_refresh()
+    if forecast is None:
+        st.info("Calculando la previsión de demanda... Aparecerá en unos segundos.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+    
+    with profiler.span("analisis.prevision"):
+        daily_forecast = staff_summary(forecast)
+        peak_hours = forecast.groupby('hora')['comensales_previstos'].sum().sort_values(ascending=False).head(3)
+        busy_days = daily_forecast['comensales_previstos'].sort_values(ascending=False).head(2)
+        peak_slot = forecast.loc[forecast['comensales_previstos'].idxmax()]
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"**Comensales previstos (próximos {FORECAST_DAYS} días)**")
+            
+            def forecast_chart():
+                fig = go.Figure([
+                    go.Bar(x=daily_forecast.index, y=daily_forecast['comensales_previstos'], name="Previstos",
+                           marker_color='#3498db'),
+                    go.Scatter(x=daily_forecast.index, y=daily_forecast['reservados'], name="Ya reservados",
+                               mode='lines+markers', line=dict(color='#e67e22'))
+                ])
+                fig.update_layout(height=350, legend=dict(orientation="h"), margin=dict(l=20, r=20, t=20, b=20))
+                return fig
+            
+            show_chart("analisis.prevision", forecast_chart, forecasts.computed_at)
+        with col2:
+            st.markdown("**Personal de sala sugerido por hora**")
+            
+            def staff_chart():
+                staff = forecast.pivot(index='hora', columns='fecha', values='personal')
+                fig = px.imshow(
+                    staff,
+                    labels=dict(x="Día", y="Hora", color="Personas"),
+                    x=[d.strftime("%a %d/%m") for d in staff.columns],
+                    y=staff.index,
+                    color_continuous_scale='Oranges',
+                    text_auto=True
+                )
+                fig.update_layout(height=350, margin=dict(l=20, r=20, t=20, b=20))
+                return fig
+            
+            show_chart("analisis.personal", staff_chart, forecasts.computed_at)
+    
+    st.markdown(f"""
+    <div style="background-color: #f0f7ff; padding: 15px; border-radius: 5px; margin-top: 10px;">
+        <h4>Análisis de Operaciones</h4>
+        <ul>
+            <li>Las horas pico previstas son: {', '.join([f'{h}:00' for h in peak_hours.index])}</li>
+            <li>Los días con más demanda prevista son: {', '.join(f'{WEEKDAY_NAMES[d.weekday()]} {d:%d/%m}' for d in busy_days.index)}</li>
+            <li>El tamaño promedio de grupo es de {avg_party_size:.1f} personas</li>
+        </ul>
+        <h4>Recomendaciones:</h4>
+        <ul>
+            <li>Refuerce la sala el {peak_slot['fecha']:%d/%m} a las {peak_slot['hora']}:00: se prevén {peak_slot['comensales_previstos']:.0f} comensales (personal de sala sugerido: {peak_slot['personal']}).</li>
+            <li>Reorganice las mesas para optimizar el espacio según el tamaño promedio de grupo.</li>
+            <li>Ofrezca promociones en los días de menor demanda prevista para equilibrar la ocupación semanal.</li>
+        </ul>
+    </div>
+    """, unsafe_allow_html=True)
+    st.caption(f"Previsión calculada a las {forecasts.computed_at:%H:%M}; se actualiza en segundo plano.")
+    st.markdown("</div>", unsafe_allow_html=True)
+
+# Elegir otro periodo o activar la comparación solo vuelve a ejecutar esta
+# sección: la previsión y las métricas globales no cambian con el periodo
+@st.fragment
+@timed("analisis.periodo")
+def period_analysis():
+    aggregates, profiler = get_aggregates(), get_profiler()
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        window = st.radio("Periodo", list(ANALYSIS_WINDOWS) + ["Personalizado"], horizontal=True)
+    with col2:
+        compare = st.checkbox("Comparar con el año anterior")
+    
+    today = datetime.now().date()
+    if window == "Personalizado":
+        custom_range = st.date_input("Rango de fechas", (today - timedelta(days=29), today))
+        # Mientras se elige el rango, date_input devuelve una sola fecha
+        first_day, last_day = custom_range if len(custom_range) == 2 else (custom_range[0], custom_range[0])
+    else:
+        first_day, last_day = today - timedelta(days=ANALYSIS_WINDOWS[window] - 1), today
+    
+    window_start = datetime.combine(first_day, datetime.min.time())
+    window_end = datetime.combine(last_day, datetime.min.time()) + timedelta(days=1)
+    # 52 semanas antes, para comparar los mismos días de la semana
+    previous_start = window_start - timedelta(days=YEAR_OVER_YEAR_DAYS)
+    previous_end = window_end - timedelta(days=YEAR_OVER_YEAR_DAYS)
+    
+    with profiler.span("analisis.totales_periodo"):
+        daily = aggregates.get('daily_totals', window_start, window_end)
+        previous = aggregates.get('daily_totals', previous_start, previous_end) if compare else None
+        
+        totals = daily.sum()
+        bookings_and_cancellations = totals['reservas'] + totals['cancelaciones']
+        cancellation_rate = totals['cancelaciones'] / bookings_and_cancellations * 100 if bookings_and_cancellations else 0
+        if previous is not None:
+            previous_totals = previous.sum()
+            previous_all = previous_totals['reservas'] + previous_totals['cancelaciones']
+            previous_rate = previous_totals['cancelaciones'] / previous_all * 100 if previous_all else 0
+        
+        def change(column):
+            if previous is None or previous_totals[column] == 0:
+                return None
+            return f"{(totals[column] / previous_totals[column] - 1) * 100:+.1f}%"
+        
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("Reservas", f"{totals['reservas']:,}", delta=change('reservas'))
+        col2.metric("Comensales", f"{totals['comensales']:,}", delta=change('comensales'))
+        col3.metric("Cancelaciones", f"{totals['cancelaciones']:,}", delta=change('cancelaciones'), delta_color="inverse")
+        col4.metric(
+            "Tasa de Cancelación", f"{cancellation_rate:.1f}%",
+            delta=f"{cancellation_rate - previous_rate:+.1f} pp" if previous is not None else None,
+            delta_color="inverse"
+        )
+        col5.metric("No Presentadas", f"{totals['no_presentadas']:,}", delta=change('no_presentadas'),
+                    delta_color="inverse")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1, profiler.span("analisis.ocupacion_periodo"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Ocupación del Periodo</div>", unsafe_allow_html=True)
+        
+        def period_chart():
+            # Barras para ventanas cortas; línea para meses y años
+            trace = go.Bar if len(daily) <= 31 else go.Scatter
+            fig = go.Figure(trace(x=daily.index, y=daily['comensales'], name="Periodo", marker_color='#3498db'))
+            if previous is not None:
+                fig.add_trace(go.Scatter(
+                    x=daily.index, y=previous['comensales'].to_numpy(), name="Año anterior",
+                    mode='lines', line=dict(color='#95a5a6', dash='dot')
+                ))
+            fig.update_layout(
+                xaxis_title="Día", yaxis_title="Comensales", legend=dict(orientation="h"),
+                margin=dict(l=20, r=20, t=20, b=20)
+            )
+            return fig
+        
+        show_chart("analisis.ocupacion_periodo", period_chart, window_start, window_end, compare)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2, profiler.span("analisis.comensales"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Distribución de Comensales</div>", unsafe_allow_html=True)
+        
+        size_distribution = aggregates.get('party_size_distribution', window_start, window_end)
+        
+        def party_size_chart():
+            fig = px.pie(
+                names=size_distribution.index,
+                values=size_distribution.values,
+                color_discrete_sequence=px.colors.sequential.Blues
+            )
+            return fig
+        
+        if size_distribution.empty:
+            st.info("No hay reservas en este periodo.")
+        else:
+            show_chart("analisis.comensales", party_size_chart, window_start, window_end)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1, profiler.span("analisis.mapa_calor"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Mapa de Calor de Ocupación</div>", unsafe_allow_html=True)
+        
+        def weekday_hour_chart():
+            # Comensales del periodo por día de la semana y hora (0 = lunes)
+            weekday_hour = aggregates.get('window_weekday_hour_covers', window_start, window_end)
+            weekday_hour = weekday_hour.assign(dia_semana=weekday_hour['dia_semana'].map(dict(enumerate(WEEKDAY_NAMES))))
+            
+            heatmap_data = weekday_hour.pivot_table(
+                index='hora',
+                columns='dia_semana',
+                values='comensales',
+                aggfunc='sum',
+                fill_value=0
+            ).reindex(columns=WEEKDAY_NAMES)
+            
+            service_hours = list(range(12, 16)) + list(range(19, 23))
+            heatmap_data = heatmap_data.reindex(service_hours, fill_value=0).fillna(0)
+            
+            fig = px.imshow(
+                heatmap_data,
+                labels=dict(x="Día", y="Hora", color="Comensales"),
+                x=heatmap_data.columns,
+                y=heatmap_data.index,
+                color_continuous_scale='YlGnBu'
+            )
+            fig.update_layout(height=400)
+            return fig
+        
+        show_chart("analisis.mapa_calor", weekday_hour_chart, window_start, window_end)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2, profiler.span("analisis.mesas"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Ocupación por Mesa</div>", unsafe_allow_html=True)
+        
+        table_usage = aggregates.get('table_totals', window_start, window_end)
+        table_usage = table_usage[table_usage['reservas'] > 0]
+        
+        def table_chart():
+            fig = px.bar(
+                x=table_usage.index.astype(str),
+                y=table_usage['comensales'],
+                labels={'x': 'Mesa', 'y': 'Comensales'},
+                color_discrete_sequence=['#2ecc71']
+            )
+            fig.update_layout(height=400)
+            return fig
+        
+        if table_usage.empty:
+            st.info("No hay reservas con mesa asignada en este periodo.")
+        else:
+            show_chart("analisis.mesas", table_chart, window_start, window_end)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with profiler.span("analisis.rotacion"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Rotación y Turnos de Mesa</div>", unsafe_allow_html=True)
+        
+        utilization = aggregates.get('table_utilization', window_start, window_end)
+        turn_times = aggregates.get('table_turn_times', window_start, window_end)
+        if utilization['turnos'] == 0:
+            st.info("No hay cambios de estado de mesa registrados en este periodo.")
+            st.markdown("</div>", unsafe_allow_html=True)
+            return
+        
+        closed_turns = turn_times['turnos'].sum()
+        mean_turn = (turn_times['duracion_media'] * turn_times['turnos']).sum() / closed_turns if closed_turns else 0
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("Turnos", f"{int(utilization['turnos']):,}")
+        col2.metric("Rotación", f"{utilization['rotacion']:.2f}x", help="Turnos por mesa y día")
+        col3.metric("Duración Media del Turno", f"{mean_turn:.0f} min")
+        col4.metric("Utilización de Plazas", f"{utilization['utilizacion']:.1f}%",
+                    help="Horas de plaza ocupadas sobre las disponibles en horario de servicio")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            def occupancy_chart():
+                occupancy = aggregates.get('occupancy_series', window_start, window_end)
+                days = (window_end - window_start).days
+                if days > OCCUPANCY_HOURLY_MAX_DAYS:
+                    occupancy, resolution = occupancy.resample('D').mean(), "media diaria"
+                elif days > OCCUPANCY_MINUTE_MAX_DAYS:
+                    occupancy, resolution = occupancy.resample('h').mean(), "media por hora"
+                else:
+                    resolution = "por minuto"
+                
+                fig = go.Figure(go.Scattergl(
+                    x=occupancy.index, y=occupancy['mesas_ocupadas'], mode='lines',
+                    line=dict(color='#e74c3c'), name="Mesas ocupadas"
+                ))
+                fig.update_layout(
+                    xaxis_title=f"Momento ({resolution})", yaxis_title="Mesas ocupadas",
+                    height=350, margin=dict(l=20, r=20, t=20, b=20)
+                )
+                return fig
+            
+            show_chart("analisis.ocupacion_minuto", occupancy_chart, window_start, window_end)
+        
+        with col2:
+            def turn_time_chart():
+                fig = px.bar(
+                    turn_times.reset_index().astype({'mesa': str}),
+                    x='mesa',
+                    y='duracion_media',
+                    hover_data=['turnos', 'duracion_mediana'],
+                    labels={'mesa': 'Mesa', 'duracion_media': 'Duración media del turno (min)',
+                            'turnos': 'Turnos', 'duracion_mediana': 'Mediana (min)'},
+                    color_discrete_sequence=['#9b59b6']
+                )
+                fig.update_layout(height=350)
+                return fig
+            
+            show_chart("analisis.turnos", turn_time_chart, window_start, window_end)
+        st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,138 @@
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import pandas as pd
+import streamlit as st
+
+import storage
+from analytics import AggregateCache, FigureCache
+from forecasting import ForecastService
+from instrumentation import Profiler
+from scheduler import StatusScheduler
+from storage import ReservationStore
+
+# Recursos, constantes y utilidades compartidos por las páginas de views/.
+# Los módulos de página se importan una sola vez por proceso, así que no
+# guardan el repositorio ni el cronómetro en variables globales: los piden a
+# la caché de recursos en cada ejecución (y siguen siendo válidos si la
+# caché se vacía, como hace benchmark.py al cambiar de base de datos).
+
+RESERVATION_STATUS_COLORS = {
+    "Confirmada": "green",
+    "Pendiente": "orange",
+    "Completada": "blue",
+    "Cancelada": "red",
+    "No presentada": "gray"
+}
+LIST_PAGE_SIZE = 50
+LIVE_REFRESH_SECONDS = 10
+STYLES_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "styles.css")
+
+# Repositorio compartido entre sesiones (SQLite en modo WAL). La ruta se lee
+# de storage.DB_PATH al crearlo para que pueda cambiarse en tiempo de ejecución.
+@st.cache_resource
+def get_store():
+    return ReservationStore(storage.DB_PATH)
+
+@st.cache_resource
+def get_aggregates():
+    return AggregateCache(get_store())
+
+@st.cache_resource
+def get_figures():
+    return FigureCache(get_store())
+
+# Previsión de demanda calculada en segundo plano; el hilo arranca la primera
+# vez que se abre una página que la usa y se para al vaciar la caché
+@st.cache_resource(on_release=lambda service: service.stop())
+def get_forecasts():
+    return ForecastService(get_store())
+
+# Barrido que completa reservas, marca las no presentadas y libera mesas;
+# app.py lo pide en cada ejecución para que arranque con la primera sesión
+@st.cache_resource(on_release=lambda scheduler: scheduler.stop())
+def get_scheduler():
+    return StatusScheduler(get_store())
+
+# Registros JSON de cada medición si RESTAURANTE_PERF_LOG está definida
+@st.cache_resource
+def get_profiler():
+    return Profiler(log_records=bool(os.environ.get("RESTAURANTE_PERF_LOG")))
+
+# Hoja de estilos leída del disco una vez por proceso
+@st.cache_resource
+def load_styles():
+    with open(STYLES_PATH, encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
+
+# Mide la función como un tramo del cronómetro, que se busca en cada llamada
+def timed(name):
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            with get_profiler().span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# Envíos al navegador con su tamaño registrado en el panel de rendimiento
+def show_html(html, section):
+    get_profiler().record_payload(section, len(html.encode("utf-8")))
+    st.markdown(html, unsafe_allow_html=True)
+
+# `build()` solo se llama si el gráfico no está en la caché para la versión
+# actual del repositorio y los parámetros `args` (fecha, periodo...)
+def show_chart(section, build, *args):
+    figures, profiler = get_figures(), get_profiler()
+    fig = figures.get(section, build, *args)
+    if profiler.measure_figures:
+        profiler.record_payload(section, figures.json_bytes(fig))
+    st.plotly_chart(fig, use_container_width=True)
+
+def show_table(df, section, **kwargs):
+    get_profiler().record_payload(section, int(df.memory_usage(deep=True).sum()))
+    return st.dataframe(df, **kwargs)
+
+# Etiqueta de mesa vectorizada ("Sin asignar" para las reservas sin mesa)
+def table_labels(mesa):
+    return mesa.astype('Int64').astype(str).where(mesa.notna(), 'Sin asignar')
+
+def page_offset(total, label="Página"):
+    # Primera fila de la página elegida de `total` filas
+    total_pages = max(1, -(-total // LIST_PAGE_SIZE))
+    page_number = 1
+    if total_pages > 1:
+        page_number = st.number_input(f"{label} (de {total_pages})", min_value=1, max_value=total_pages, value=1)
+    return (page_number - 1) * LIST_PAGE_SIZE
+
+def paginate(df, label="Página"):
+    start = page_offset(len(df), label)
+    return df.iloc[start:start + LIST_PAGE_SIZE]
+
+# El estado de una mesa describe el servicio de hoy. Las reservas de otros
+# días ocupan la mesa solo en el índice de turnos y no cambian ese estado.
+def update_table_for_booking(mesa, fecha, estado):
+    if mesa is not None and pd.notna(mesa) and pd.Timestamp(fecha).date() == datetime.now().date():
+        get_store().set_table_status(mesa, estado)
+
+# Escrituras de esta sesión: el aviso de cambios no las cuenta como ajenas
+@contextmanager
+def own_writes():
+    with get_store().recording_versions() as versions:
+        try:
+            yield
+        finally:
+            st.session_state.setdefault('own_versions', set()).update(versions)
+
+# Sondeo del contador de versión: avisa de los cambios hechos desde otras sesiones
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+def show_change_feed():
+    own_versions = st.session_state.get('own_versions', set())
+    changes = [change for change in get_store().changes_since(st.session_state.seen_version)
+               if change[0] not in own_versions]
+    if changes:
+        st.info(f"{len(changes)} cambios nuevos desde otras sesiones")
+        if st.button("Actualizar datos"):
+            st.rerun(scope="app")
@@ -0,0 +1,130 @@
+from datetime import datetime
+
+import pandas as pd
+import plotly.express as px
+import streamlit as st
+
+from indices import INACTIVE_STATUSES
+from views.common import (LIVE_REFRESH_SECONDS, RESERVATION_STATUS_COLORS, get_profiler, get_scheduler, get_store,
+                          show_chart, show_html, table_labels, timed)
+
+# Construye el HTML de todas las tarjetas en una sola pasada de columnas para
+# enviarlo con un único st.markdown en lugar de un bloque por fila.
+def upcoming_cards_html(df, now):
+    minutes = ((df['fecha'] - now).dt.total_seconds() // 60).astype(int).astype(str)
+    # El estado es categórico: se pasa a texto para concatenarlo
+    estado = df['estado'].astype(str)
+    cards = (
+        '<div style="border-left: 4px solid ' + estado.map(RESERVATION_STATUS_COLORS) +
+        '; padding-left: 10px; margin-bottom: 10px;">'
+        '<div style="display: flex; justify-content: space-between;">'
+        '<div><strong>' + df['nombre'] + '</strong> - ' + df['comensales'].astype(str) + ' personas</div>'
+        '<div>' + df['fecha'].dt.strftime('%H:%M') + ' (' + minutes + ' min)</div>'
+        '</div>'
+        '<div style="color: gray; font-size: 0.9rem;">'
+        'Mesa: ' + table_labels(df['mesa']) + ' | Tel: ' + df['telefono'] + ' | ' + estado +
+        '</div></div>'
+    )
+    return "".join(cards)
+
+# El panel se refresca solo, sin volver a ejecutar toda la aplicación
+@st.fragment(run_every=LIVE_REFRESH_SECONDS)
+@timed("panel")
+def show_dashboard(selected_date):
+    store, profiler = get_store(), get_profiler()
+    st.markdown("<div class='title'>Panel de Control</div>", unsafe_allow_html=True)
+    
+    with profiler.span("panel.franja_diaria"):
+        daily_reservations = store.reservations_for_day(selected_date)
+        tables = store.tables()
+    
+    with profiler.span("panel.metricas"):
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{len(daily_reservations)}</div>", unsafe_allow_html=True)
+            st.markdown("<div class='metric-label'>Reservas Hoy</div>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col2:
+            # Sin las canceladas ni las que el barrido ha dado por no presentadas
+            attending = ~daily_reservations['estado'].isin(INACTIVE_STATUSES)
+            expected_guests = daily_reservations.loc[attending, 'comensales'].sum()
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{expected_guests}</div>", unsafe_allow_html=True)
+            st.markdown("<div class='metric-label'>Comensales Esperados</div>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col3:
+            tables_in_use = len(tables[tables['estado'] != "Libre"])
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{tables_in_use}/{len(tables)}</div>", unsafe_allow_html=True)
+            st.markdown("<div class='metric-label'>Mesas Ocupadas</div>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+        
+        with col4:
+            confirmed = len(daily_reservations[daily_reservations['estado'] == "Confirmada"])
+            pending = len(daily_reservations[daily_reservations['estado'] == "Pendiente"])
+            st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
+            st.markdown(f"<div class='metric-value'>{confirmed}/{confirmed+pending}</div>", unsafe_allow_html=True)
+            st.markdown("<div class='metric-label'>Reservas Confirmadas</div>", unsafe_allow_html=True)
+            st.markdown("</div>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1, profiler.span("panel.grafico_horas"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Distribución de Reservas por Hora</div>", unsafe_allow_html=True)
+        
+        def hourly_chart():
+            hourly_counts = pd.DataFrame({
+                'hora': range(12, 24),
+                'count': store.hourly_bookings(selected_date)[12:24]
+            })
+            
+            fig = px.bar(hourly_counts, x='hora', y='count',
+                        labels={'hora': 'Hora del Día', 'count': 'Número de Reservas'},
+                        color_discrete_sequence=['#3498db'])
+            fig.update_layout(height=300, margin=dict(l=20, r=20, t=20, b=20))
+            return fig
+        
+        show_chart("panel.grafico_horas", hourly_chart, selected_date)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    with col2, profiler.span("panel.grafico_mesas"):
+        st.markdown("<div class='card'>", unsafe_allow_html=True)
+        st.markdown("<div class='subtitle'>Estado de Mesas</div>", unsafe_allow_html=True)
+        
+        def table_status_chart():
+            table_status = tables['estado'].value_counts().reset_index()
+            table_status.columns = ['Estado', 'Cantidad']
+            
+            fig = px.pie(table_status, values='Cantidad', names='Estado',
+                        color_discrete_sequence=['#2ecc71', '#e74c3c', '#f39c12'])
+            fig.update_layout(height=300, margin=dict(l=20, r=20, t=20, b=20))
+            return fig
+        
+        show_chart("panel.grafico_mesas", table_status_chart)
+        st.markdown("</div>", unsafe_allow_html=True)
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Próximas Reservas</div>", unsafe_allow_html=True)
+    
+    with profiler.span("panel.proximas"):
+        now = datetime.now()
+        upcoming = daily_reservations[daily_reservations['fecha'] >= now].sort_values('fecha').head(5)
+        
+        if not upcoming.empty:
+            show_html(upcoming_cards_html(upcoming, now), "panel.proximas")
+        else:
+            st.write("No hay próximas reservas para hoy.")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    sweep = get_scheduler().last_result
+    if sweep is not None:
+        st.caption(f"Estados actualizados automáticamente a las {sweep['momento']:%H:%M}: "
+                   f"{sweep['completadas']} completadas, {sweep['no_presentadas']} no presentadas y "
+                   f"{sweep['mesas_liberadas']} mesas liberadas en el último barrido.")
+
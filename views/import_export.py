@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta
+
+import streamlit as st
+
+from transfer import (EXPORT_FORMATS, IMPORT_FORMATS, ImportSchemaError, export_reservations, export_tables,
+                      import_reservations, import_tables)
+from views.common import get_store, own_writes
+
+def import_export_data(selected_date):
+    st.markdown("<div class='title'>Importar y Exportar</div>", unsafe_allow_html=True)
+    
+    tab1, tab2 = st.tabs(["Exportar", "Importar"])
+    
+    with tab1:
+        reservations_export(selected_date)
+        tables_export()
+    
+    with tab2:
+        data_import()
+
+# Cada bloque es un fragmento: elegir fechas, formato o fichero solo vuelve a
+# ejecutar su propio bloque
+@st.fragment
+def reservations_export(selected_date):
+    store = get_store()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Exportar Reservas</div>", unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        export_start = st.date_input("Desde", selected_date.replace(day=1), key="export_start")
+    with col2:
+        export_end = st.date_input("Hasta (incluido)", selected_date, key="export_end")
+    with col3:
+        export_format = st.selectbox("Formato", list(EXPORT_FORMATS), key="export_format")
+    
+    extension, mime = EXPORT_FORMATS[export_format]
+    # El fichero solo se genera al pedirlo, no en cada ejecución de la página
+    if st.button("Preparar exportación de reservas"):
+        if export_end < export_start:
+            st.error("La fecha final no puede ser anterior a la inicial")
+        else:
+            start = datetime.combine(export_start, datetime.min.time())
+            try:
+                st.session_state.reservations_export = (
+                    export_reservations(store, start, start + timedelta(days=(export_end - export_start).days + 1),
+                                        extension),
+                    f"reservas_{export_start:%Y%m%d}_{export_end:%Y%m%d}.{extension}",
+                    mime
+                )
+            except ValueError as error:
+                st.error(str(error))
+    
+    if 'reservations_export' in st.session_state:
+        data, file_name, file_mime = st.session_state.reservations_export
+        st.download_button("Descargar reservas", data, file_name=file_name, mime=file_mime)
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+def tables_export():
+    store = get_store()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Exportar Mesas</div>", unsafe_allow_html=True)
+    
+    tables_format = st.selectbox("Formato", list(EXPORT_FORMATS), key="tables_export_format")
+    extension, mime = EXPORT_FORMATS[tables_format]
+    st.download_button("Descargar mesas", export_tables(store, extension),
+                       file_name=f"mesas.{extension}", mime=mime)
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+def data_import():
+    store = get_store()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Importar Datos</div>", unsafe_allow_html=True)
+    
+    st.caption(
+        "Reservas: columnas nombre, telefono, fecha y comensales (mesa, estado y notas opcionales). "
+        "Mesas: columnas numero, capacidad y ubicacion (estado, pos_x y pos_y opcionales). "
+        "Las filas no válidas se descartan."
+    )
+    
+    import_kind = st.radio("Tipo de datos", ["Reservas", "Mesas"], horizontal=True)
+    uploaded = st.file_uploader("Fichero", type=IMPORT_FORMATS)
+    
+    if uploaded is not None and st.button("Importar"):
+        importer = import_reservations if import_kind == "Reservas" else import_tables
+        try:
+            with st.spinner("Importando..."), own_writes():
+                imported, rejected = importer(store, uploaded, uploaded.name)
+        except ImportSchemaError as error:
+            st.error(str(error))
+        else:
+            st.success(f"{imported} filas importadas")
+            if rejected:
+                st.warning(f"{rejected} filas descartadas por datos no válidos")
+    
+    st.markdown("</div>", unsafe_allow_html=True)
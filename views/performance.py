@@ -0,0 +1,39 @@
+import streamlit as st
+
+from views.common import get_figures, get_profiler
+
+def show_performance(selected_date):
+    profiler, figures = get_profiler(), get_figures()
+    st.markdown("<div class='title'>Rendimiento</div>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        profiler.measure_figures = st.checkbox(
+            "Medir el tamaño de los gráficos", value=profiler.measure_figures,
+            help="Serializa una vez más cada gráfico nuevo para medirlo; desactívelo en servicio normal"
+        )
+    with col2:
+        if st.button("Reiniciar mediciones"):
+            profiler.reset()
+    
+    st.caption(
+        "Tiempos acumulados desde el arranque del servidor para todas las sesiones. "
+        "Defina RESTAURANTE_PERF_LOG para escribir cada medición como registro JSON."
+    )
+    st.caption(f"Caché de gráficos: {figures.hits} reutilizados, {figures.misses} construidos "
+               f"(máximo {figures.max_entries} en memoria)")
+    
+    st.markdown("<div class='subtitle'>Tiempo por sección</div>", unsafe_allow_html=True)
+    st.dataframe(profiler.span_summary(), hide_index=True, use_container_width=True)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("<div class='subtitle'>Ejecuciones por página</div>", unsafe_allow_html=True)
+        st.dataframe(profiler.rerun_counts(), hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("<div class='subtitle'>Tamaño de los envíos</div>", unsafe_allow_html=True)
+        st.dataframe(profiler.payload_summary(), hide_index=True, use_container_width=True)
+    
+    with st.expander("Mediciones recientes"):
+        st.dataframe(profiler.recent().iloc[::-1], hide_index=True, use_container_width=True)
+
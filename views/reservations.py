@@ -0,0 +1,319 @@
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+from analytics import STATUSES
+from seating import DEFAULT_TURN_MINUTES, LOCATIONS, plan_seating, preferred_location, suggest_table
+from storage import MAX_PARTY_SIZE, ConcurrentModificationError
+from views.common import (LIST_PAGE_SIZE, get_profiler, get_store, own_writes, page_offset, paginate, show_table,
+                          table_labels, timed, update_table_for_booking)
+
+@timed("reservas")
+def manage_reservations(selected_date):
+    st.markdown("<div class='title'>Gestión de Reservas</div>", unsafe_allow_html=True)
+    
+    tab1, tab2, tab3 = st.tabs(["Ver Reservas", "Nueva Reserva", "Búsqueda"])
+    
+    with tab1:
+        reservation_list(selected_date)
+        seating_assignment(selected_date)
+    
+    with tab2:
+        new_reservation_form(selected_date)
+    
+    with tab3:
+        reservation_search()
+
+# Cada sección es un fragmento: un cambio en sus controles vuelve a ejecutar
+# solo esa sección. Las acciones que modifican datos de otras secciones piden
+# una ejecución completa con st.rerun().
+@st.fragment
+@timed("reservas.seccion_lista")
+def reservation_list(selected_date):
+    store, profiler = get_store(), get_profiler()
+    
+    with profiler.span("reservas.franja_diaria"):
+        daily_reservations = store.reservations_for_day(selected_date)
+    
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        status_filter = st.multiselect(
+            "Estado",
+            options=STATUSES,
+            default=["Confirmada", "Pendiente"]
+        )
+    
+    with col2:
+        time_filter = st.multiselect(
+            "Horario",
+            options=["Comida (12-16h)", "Cena (19-23h)"],
+            default=["Comida (12-16h)", "Cena (19-23h)"]
+        )
+    
+    with col3:
+        table_filter = st.checkbox("Solo sin mesa asignada", False)
+    
+    with profiler.span("reservas.filtros"):
+        filtered_df = daily_reservations.copy()
+        
+        if status_filter:
+            filtered_df = filtered_df[filtered_df['estado'].isin(status_filter)]
+        
+        if time_filter:
+            mask = pd.Series(False, index=filtered_df.index)
+            if "Comida (12-16h)" in time_filter:
+                mask |= ((filtered_df['fecha'].dt.hour >= 12) & (filtered_df['fecha'].dt.hour < 16))
+            if "Cena (19-23h)" in time_filter:
+                mask |= ((filtered_df['fecha'].dt.hour >= 19) & (filtered_df['fecha'].dt.hour < 23))
+            filtered_df = filtered_df[mask]
+        
+        if table_filter:
+            filtered_df = filtered_df[filtered_df['mesa'].isna()]
+    
+    if not filtered_df.empty:
+        st.write("### Lista de Reservas")
+        page_df = paginate(filtered_df)
+        # Una sola tabla con selección de fila; las acciones se aplican a la fila elegida
+        with profiler.span("reservas.lista"):
+            selection = show_table(
+                page_df.assign(
+                    fecha=page_df['fecha'].dt.strftime('%d/%m/%Y %H:%M'),
+                    mesa=table_labels(page_df['mesa'])
+                )[['id', 'nombre', 'fecha', 'comensales', 'mesa', 'estado']],
+                "reservas.lista",
+                hide_index=True,
+                use_container_width=True,
+                on_select="rerun",
+                selection_mode="single-row",
+                key="reservation_list"
+            )
+        
+        if selection.selection.rows:
+            row = page_df.iloc[selection.selection.rows[0]]
+            col_b, col_c = st.columns(2)
+            with col_b:
+                if st.button("Editar", key="edit_selected"):
+                    st.session_state.edit_reservation_id = row['id']
+                    st.session_state.edit_reservation_version = row['version']
+            with col_c:
+                if st.button("Borrar", key="delete_selected"):
+                    with own_writes():
+                        update_table_for_booking(row['mesa'], row['fecha'], "Libre")
+                        store.delete_reservation(row['id'])
+                    st.success(f"Reserva ID {row['id']} borrada con éxito")
+                    st.rerun()
+        
+        edit_reservation_form()
+    else:
+        st.info("No hay reservas que coincidan con los filtros seleccionados.")
+
+# Dentro de la lista: escribir en el formulario no vuelve a dibujar la tabla
+@st.fragment
+@timed("reservas.seccion_edicion")
+def edit_reservation_form():
+    store = get_store()
+    tables = store.tables()
+    
+    # La reserva en edición puede haber sido borrada desde otra sesión
+    if ('edit_reservation_id' in st.session_state and
+            store.get_reservation(st.session_state.edit_reservation_id) is None):
+        del st.session_state.edit_reservation_id
+    
+    if 'edit_reservation_id' in st.session_state:
+        reservation_to_edit = store.get_reservation(st.session_state.edit_reservation_id)
+        
+        st.write("### Editar Reserva")
+        edit_col1, edit_col2 = st.columns(2)
+        
+        with edit_col1:
+            edit_name = st.text_input("Nombre del cliente", value=reservation_to_edit['nombre'], key="edit_name")
+            edit_phone = st.text_input("Teléfono", value=reservation_to_edit['telefono'], key="edit_phone")
+            edit_size = st.number_input("Número de comensales", min_value=1, max_value=MAX_PARTY_SIZE, 
+                                      value=int(reservation_to_edit['comensales']), key="edit_size")
+        
+        with edit_col2:
+            edit_date = st.date_input("Fecha de reserva", value=reservation_to_edit['fecha'].date(), key="edit_date")
+            edit_time = st.time_input("Hora", value=reservation_to_edit['fecha'].time(), key="edit_time")
+            edit_status = st.selectbox("Estado", STATUSES,
+                                     index=STATUSES.index(reservation_to_edit['estado']),
+                                     key="edit_status")
+        
+        # Mesas sin otro turno solapado en la fecha y hora editadas
+        free_tables = store.available_tables(datetime.combine(edit_date, edit_time),
+                                             exclude_id=reservation_to_edit['id'])
+        edit_table = st.selectbox(
+            "Mesa (opcional)",
+            options=[None] + free_tables,
+            index=0 if pd.isna(reservation_to_edit['mesa']) else 
+                  free_tables.index(reservation_to_edit['mesa']) + 1 if reservation_to_edit['mesa'] in free_tables else 0,
+            key="edit_table"
+        )
+        edit_suggestion = suggest_table(
+            store.reservations_for_day(edit_date),
+            tables[tables['numero'].isin(free_tables)],
+            datetime.combine(edit_date, edit_time),
+            edit_size,
+            ubicacion=preferred_location(reservation_to_edit['notas']),
+            exclude_id=reservation_to_edit['id']
+        )
+        st.caption(f"Mesa sugerida: {edit_suggestion}" if edit_suggestion is not None
+                   else "No hay mesa libre con capacidad suficiente para ese turno")
+        edit_notes = st.text_area("Notas adicionales", value=reservation_to_edit['notas'], key="edit_notes")
+        
+        if st.button("Guardar Cambios", key="save_edit"):
+            if not edit_name or not edit_phone:
+                st.error("Nombre y teléfono son obligatorios")
+            else:
+                old_table = reservation_to_edit['mesa']
+                new_datetime = datetime.combine(edit_date, edit_time)
+                with own_writes():
+                    try:
+                        # Solo se guarda si nadie ha modificado la reserva desde que se abrió la edición
+                        store.update_reservation(st.session_state.edit_reservation_id, {
+                            "nombre": edit_name,
+                            "telefono": edit_phone,
+                            "fecha": new_datetime,
+                            "comensales": edit_size,
+                            "mesa": edit_table,
+                            "estado": edit_status,
+                            "notas": edit_notes
+                        }, expected_version=st.session_state.get('edit_reservation_version'))
+                    except ConcurrentModificationError:
+                        st.error("Otra sesión ha modificado esta reserva. Vuelva a abrirla para ver los datos actuales.")
+                        del st.session_state.edit_reservation_id
+                    else:
+                        if pd.notna(old_table) and old_table != edit_table:
+                            update_table_for_booking(old_table, reservation_to_edit['fecha'], "Libre")
+                        update_table_for_booking(edit_table, new_datetime, "Reservada")
+                        
+                        st.success(f"Reserva ID {st.session_state.edit_reservation_id} actualizada con éxito")
+                        del st.session_state.edit_reservation_id
+                        st.rerun()
+        
+        if st.button("Cancelar Edición", key="cancel_edit"):
+            del st.session_state.edit_reservation_id
+            st.rerun(scope="fragment")
+
+@st.fragment
+@timed("reservas.seccion_asignacion")
+def seating_assignment(selected_date):
+    store, profiler = get_store(), get_profiler()
+    daily_reservations = store.reservations_for_day(selected_date)
+    tables = store.tables()
+    
+    with st.expander("Asignación automática de mesas"):
+        turn_minutes = st.number_input("Duración del turno (minutos)", min_value=30, max_value=240,
+                                       value=DEFAULT_TURN_MINUTES, step=15)
+        with profiler.span("reservas.plan_mesas"):
+            plan = plan_seating(daily_reservations, tables, turn_minutes)
+        unassigned = daily_reservations[daily_reservations['mesa'].isna() &
+                                        (daily_reservations['estado'] != "Cancelada")]
+        proposals = plan[plan['id'].isin(unassigned['id']) & plan['mesa'].notna()]
+        st.write(f"{len(proposals)} de {len(unassigned)} reservas sin mesa pueden sentarse sin solapar turnos.")
+        
+        if st.button("Asignar mesas", disabled=proposals.empty):
+            # Cada reserva se asigna solo si no ha cambiado desde que se calculó el plan
+            versions = dict(zip(daily_reservations['id'].tolist(), daily_reservations['version'].tolist()))
+            assigned, skipped = 0, []
+            with own_writes():
+                for reservation_id, mesa in zip(proposals['id'].tolist(), proposals['mesa'].tolist()):
+                    try:
+                        store.update_reservation(reservation_id, {"mesa": mesa},
+                                                 expected_version=versions[reservation_id])
+                    except (ConcurrentModificationError, KeyError):
+                        skipped.append(reservation_id)
+                    else:
+                        update_table_for_booking(mesa, selected_date, "Reservada")
+                        assigned += 1
+            st.success(f"{assigned} reservas asignadas")
+            if skipped:
+                # Sin rerun, para que el aviso siga visible
+                st.warning(f"{len(skipped)} reservas no se asignaron porque otra sesión las modificó o borró "
+                           f"(ID: {', '.join(str(reservation_id) for reservation_id in skipped)}). "
+                           "Revise el plan antes de volver a asignar.")
+            else:
+                st.rerun()
+
+@st.fragment
+@timed("reservas.seccion_nueva")
+def new_reservation_form(selected_date):
+    store = get_store()
+    tables = store.tables()
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        new_name = st.text_input("Nombre del cliente")
+        new_phone = st.text_input("Teléfono")
+        new_size = st.number_input("Número de comensales", min_value=1, max_value=MAX_PARTY_SIZE, value=2)
+    
+    with col2:
+        new_date = st.date_input("Fecha de reserva", selected_date)
+        new_time = st.time_input("Hora", datetime.now().replace(hour=14, minute=0).time())
+        new_status = st.selectbox("Estado", ["Confirmada", "Pendiente"])
+        new_location = st.selectbox("Ubicación preferida", [None] + LOCATIONS,
+                                    format_func=lambda v: v or "Sin preferencia")
+    
+    # Mesas sin turno solapado y sugerencia por capacidad y ubicación
+    free_tables = store.available_tables(datetime.combine(new_date, new_time))
+    new_suggestion = suggest_table(
+        store.reservations_for_day(new_date),
+        tables[tables['numero'].isin(free_tables)],
+        datetime.combine(new_date, new_time),
+        new_size,
+        ubicacion=new_location
+    )
+    new_table = st.selectbox(
+        "Mesa (opcional)",
+        options=[None] + free_tables,
+        index=free_tables.index(new_suggestion) + 1 if new_suggestion is not None else 0,
+        help="Se preselecciona la mesa libre más ajustada al grupo"
+    )
+    new_notes = st.text_area("Notas adicionales")
+    
+    if st.button("Crear Reserva"):
+        if not new_name or not new_phone:
+            st.error("Nombre y teléfono son obligatorios")
+        else:
+            new_datetime = datetime.combine(new_date, new_time)
+            
+            with own_writes():
+                new_id = store.add_reservation({
+                    "nombre": new_name,
+                    "telefono": new_phone,
+                    "fecha": new_datetime,
+                    "comensales": new_size,
+                    "mesa": new_table,
+                    "estado": new_status,
+                    "notas": new_notes
+                })
+                update_table_for_booking(new_table, new_datetime, "Reservada")
+            
+            st.success(f"Reserva creada con éxito (ID: {new_id})")
+
+@st.fragment
+@timed("reservas.seccion_busqueda")
+def reservation_search():
+    store, profiler = get_store(), get_profiler()
+    
+    search_query = st.text_input("Buscar por nombre o teléfono")
+    
+    if search_query:
+        # Primero solo el total, para elegir la página; después se construye solo esa página
+        with profiler.span("reservas.busqueda"):
+            total, _ = store.search(search_query, limit=0)
+        
+        if total:
+            st.caption(f"{total} resultados")
+            offset = page_offset(total, "Página de resultados")
+            with profiler.span("reservas.busqueda_pagina"):
+                _, search_results = store.search(search_query, limit=LIST_PAGE_SIZE, offset=offset)
+            show_table(
+                search_results[['id', 'nombre', 'fecha', 'comensales', 'mesa', 'estado', 'telefono']],
+                "reservas.resultados_busqueda",
+                hide_index=True,
+                use_container_width=True
+            )
+        else:
+            st.info("No se encontraron resultados.")
@@ -0,0 +1,306 @@
+from datetime import datetime, timedelta
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from storage import MAX_PARTY_SIZE, ConcurrentModificationError
+from views.common import RESERVATION_STATUS_COLORS, get_store, own_writes, show_chart, show_html, show_table, timed
+
+WEBGL_TABLE_THRESHOLD = 200
+TABLE_STATUS_COLORS = {"Libre": "green", "Ocupada": "red", "Reservada": "orange"}
+
+def table_reservation_cards_html(df):
+    estado = df['estado'].astype(str)
+    cards = (
+        '<div style="margin-top: 10px; padding: 5px 10px; border-left: 3px solid ' +
+        estado.map(RESERVATION_STATUS_COLORS) + ';">'
+        '<div><strong>' + df['nombre'] + '</strong> - ' + df['comensales'].astype(str) + ' personas</div>'
+        '<div>' + df['fecha'].dt.strftime('%H:%M') + ' | ' + estado + '</div>'
+        '</div>'
+    )
+    return "".join(cards)
+
+@timed("mesas")
+def manage_tables(selected_date):
+    st.markdown("<div class='title'>Gestión de Mesas</div>", unsafe_allow_html=True)
+    
+    tab1, tab2, tab3 = st.tabs(["Ver Mesas", "Lista de Espera", "Agregar Mesa"])
+    
+    with tab1:
+        col1, col2 = st.columns([2, 1])
+        
+        with col1:
+            table_map_section()
+        
+        with col2:
+            table_details(selected_date)
+    
+    with tab2:
+        waitlist_section()
+    
+    with tab3:
+        add_table_form()
+
+# Mapa, detalles y alta son fragmentos: elegir otra mesa o cambiar el modo del
+# mapa solo vuelve a ejecutar su sección. Los cambios de estado y las altas
+# piden una ejecución completa para que el mapa los refleje.
+@st.fragment
+@timed("mesas.mapa")
+def table_map_section():
+    tables_df = get_store().tables()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Mapa de Mesas</div>", unsafe_allow_html=True)
+    
+    # Coordenadas reales del plano si todas las mesas las tienen; si no, cuadrícula
+    has_floor_plan = not tables_df.empty and tables_df[['pos_x', 'pos_y']].notna().all(axis=None)
+    use_floor_plan = has_floor_plan and st.checkbox("Usar coordenadas del plano", value=True)
+    
+    def table_map():
+        tables_df['color'] = tables_df['estado'].astype(str).map(TABLE_STATUS_COLORS)
+        if use_floor_plan:
+            tables_df['x'] = tables_df['pos_x']
+            tables_df['y'] = tables_df['pos_y']
+        else:
+            tables_per_row = 5
+            tables_df['x'] = tables_df.index % tables_per_row
+            tables_df['y'] = tables_df.index // tables_per_row
+        
+        hovertext = (
+            "Mesa " + tables_df['numero'].astype(str) +
+            "<br>Capacidad: " + tables_df['capacidad'].astype(str) +
+            "<br>Estado: " + tables_df['estado'].astype(str) +
+            "<br>Ubicación: " + tables_df['ubicacion'].astype(str)
+        )
+        
+        # Una única traza para todas las mesas; WebGL en salas grandes
+        scatter = go.Scattergl if len(tables_df) > WEBGL_TABLE_THRESHOLD else go.Scatter
+        fig = go.Figure(scatter(
+            x=tables_df['x'],
+            y=tables_df['y'],
+            mode='markers+text',
+            marker=dict(
+                size=tables_df['capacidad'] * 5,
+                color=tables_df['color'],
+                line=dict(width=2, color='white')
+            ),
+            text=tables_df['numero'].astype(str),
+            textposition="middle center",
+            hoverinfo="text",
+            hovertext=hovertext
+        ))
+        
+        fig.update_layout(
+            showlegend=False,
+            margin=dict(l=5, r=5, t=5, b=5),
+            height=400,
+            xaxis=dict(showgrid=False, zeroline=False, visible=False),
+            yaxis=dict(showgrid=False, zeroline=False, visible=False),
+            plot_bgcolor='rgba(240,240,240,0.8)'
+        )
+        return fig
+    
+    show_chart("mesas.mapa", table_map, use_floor_plan)
+    st.markdown("</div>", unsafe_allow_html=True)
+    
+    col_a, col_b, col_c = st.columns(3)
+    with col_a:
+        st.markdown("🟢 Libre")
+    with col_b:
+        st.markdown("🟠 Reservada")
+    with col_c:
+        st.markdown("🔴 Ocupada")
+
+@st.fragment
+@timed("mesas.detalles")
+def table_details(selected_date):
+    store = get_store()
+    tables_df = store.tables()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Detalles de Mesa</div>", unsafe_allow_html=True)
+    
+    selected_table = st.selectbox(
+        "Seleccionar Mesa",
+        options=tables_df['numero'].tolist()
+    )
+    
+    if selected_table:
+        table_data = tables_df[tables_df['numero'] == selected_table].iloc[0]
+        
+        st.markdown(f"""
+        <div style="padding: 10px; border-radius: 5px; background-color: #f8f9fa;">
+            <h3>Mesa {selected_table}</h3>
+            <p><strong>Capacidad:</strong> {table_data['capacidad']} personas</p>
+            <p><strong>Ubicación:</strong> {table_data['ubicacion']}</p>
+            <p><strong>Estado:</strong> <span style="color: {TABLE_STATUS_COLORS[table_data['estado']]};">{table_data['estado']}</span></p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        day_start = datetime.combine(selected_date, datetime.min.time())
+        table_reservations = store.reservations_between(
+            day_start, day_start + timedelta(days=1), mesa=selected_table
+        )
+        
+        if not table_reservations.empty:
+            st.markdown("<p><strong>Reservas para hoy:</strong></p>", unsafe_allow_html=True)
+            show_html(table_reservation_cards_html(table_reservations), "mesas.reservas_del_dia")
+        else:
+            st.markdown("<p>No hay reservas para esta mesa hoy.</p>", unsafe_allow_html=True)
+        
+        # Al liberar una mesa, el grupo de la lista de espera al que ofrecérsela
+        if table_data['estado'] == "Libre":
+            next_party = store.next_walk_in(table_data['capacidad'])
+            if next_party is not None:
+                st.info(f"Siguiente en la lista de espera: {next_party['nombre']} "
+                        f"({next_party['comensales']} personas, desde las {next_party['llegada']:%H:%M})")
+        
+        new_status = st.selectbox(
+            "Cambiar estado",
+            options=["Libre", "Ocupada", "Reservada"],
+            index=["Libre", "Ocupada", "Reservada"].index(table_data['estado'])
+        )
+        
+        # Versión de la mesa que el usuario tenía en pantalla al pulsar el botón
+        seen_versions = st.session_state.setdefault('seen_table_versions', {})
+        expected_version = seen_versions.get(selected_table, table_data['version'])
+        seen_versions[selected_table] = table_data['version']
+        
+        if st.button("Actualizar Estado"):
+            try:
+                with own_writes():
+                    store.set_table_status(selected_table, new_status, expected_version=expected_version)
+            except ConcurrentModificationError:
+                st.error(f"Otra sesión ha cambiado la mesa {selected_table}. Revise su estado actual.")
+            else:
+                st.success(f"Estado de mesa {selected_table} actualizado a {new_status}")
+                st.rerun()
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+def wait_label(minutes):
+    if pd.isna(minutes):
+        return "Sin mesa adecuada"
+    if minutes < 1:
+        return "Mesa libre ya"
+    return f"~{int(round(minutes))} min"
+
+# Clientes sin reserva esperando mesa. La espera estimada sale de la cola en
+# memoria del repositorio, que se actualiza con cada cambio de estado de mesa.
+@st.fragment
+@timed("mesas.espera")
+def waitlist_section():
+    store = get_store()
+    waiting = store.waitlist()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Lista de Espera</div>", unsafe_allow_html=True)
+    
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        walk_in_name = st.text_input("Nombre del grupo")
+    with col2:
+        walk_in_phone = st.text_input("Teléfono de aviso (opcional)")
+    with col3:
+        walk_in_size = st.number_input("Personas", min_value=1, max_value=MAX_PARTY_SIZE, value=2)
+    
+    if st.button("Añadir a la lista"):
+        if not walk_in_name:
+            st.error("Indique un nombre para llamar al grupo.")
+        else:
+            with own_writes():
+                store.add_walk_in({"nombre": walk_in_name, "telefono": walk_in_phone, "comensales": walk_in_size})
+            st.rerun()
+    
+    if waiting.empty:
+        st.info("No hay nadie en la lista de espera.")
+        st.markdown("</div>", unsafe_allow_html=True)
+        return
+    
+    show_table(pd.DataFrame({
+        "Nombre": waiting['nombre'],
+        "Personas": waiting['comensales'],
+        "Llegada": waiting['llegada'].dt.strftime('%H:%M'),
+        "Espera estimada": waiting['espera_min'].map(wait_label),
+    }), "mesas.lista_espera", hide_index=True, use_container_width=True)
+    
+    parties = dict(zip(waiting['id'].tolist(),
+                       (waiting['nombre'] + " (" + waiting['comensales'].astype(str) + " personas)").tolist()))
+    party_id = st.selectbox("Grupo", options=list(parties), format_func=parties.get)
+    party_size = int(waiting.loc[waiting['id'] == party_id, 'comensales'].iloc[0])
+    
+    # Mesas libres en las que cabe el grupo, de menor a mayor capacidad
+    tables_df = store.tables()
+    free_tables = tables_df[(tables_df['estado'] == "Libre") & (tables_df['capacidad'] >= party_size)]
+    free_tables = free_tables.sort_values(['capacidad', 'numero'])
+    
+    col_a, col_b = st.columns(2)
+    with col_a:
+        if free_tables.empty:
+            st.warning("No hay ninguna mesa libre para este grupo.")
+        else:
+            table_options = dict(zip(
+                free_tables['numero'].tolist(),
+                ("Mesa " + free_tables['numero'].astype(str) + " (" + free_tables['capacidad'].astype(str) + " personas)").tolist()
+            ))
+            numero = st.selectbox("Mesa libre", options=list(table_options), format_func=table_options.get)
+            if st.button("Sentar"):
+                try:
+                    with own_writes():
+                        store.seat_walk_in(party_id, numero)
+                except KeyError:
+                    st.error("El grupo o la mesa ya no están disponibles. Revise la lista.")
+                else:
+                    st.rerun()
+    with col_b:
+        if st.button("Quitar de la lista"):
+            with own_writes():
+                store.remove_walk_in(party_id)
+            st.rerun()
+    
+    st.markdown("</div>", unsafe_allow_html=True)
+
+@st.fragment
+@timed("mesas.nueva")
+def add_table_form():
+    store = get_store()
+    tables_df = store.tables()
+    
+    st.markdown("<div class='card'>", unsafe_allow_html=True)
+    st.markdown("<div class='subtitle'>Agregar Nueva Mesa</div>", unsafe_allow_html=True)
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        new_table_number = st.number_input("Número de Mesa", min_value=1, value=int(tables_df['numero'].max() + 1) if not tables_df.empty else 1, step=1)
+        new_capacity = st.number_input("Capacidad", min_value=1, max_value=MAX_PARTY_SIZE, value=4)
+    
+    with col2:
+        new_location = st.selectbox("Ubicación", ["Interior", "Exterior", "Terraza"])
+        new_status = st.selectbox("Estado Inicial", ["Libre", "Ocupada", "Reservada"], index=0)
+    
+    col3, col4 = st.columns(2)
+    with col3:
+        new_pos_x = st.number_input("Posición X en el plano (opcional)", value=None, step=0.5)
+    with col4:
+        new_pos_y = st.number_input("Posición Y en el plano (opcional)", value=None, step=0.5)
+    
+    if st.button("Agregar Mesa"):
+        # Verificar si el número de mesa ya existe
+        if new_table_number in tables_df['numero'].values:
+            st.error(f"La mesa número {new_table_number} ya existe. Por favor, elija otro número.")
+        else:
+            with own_writes():
+                store.add_table({
+                    "numero": new_table_number,
+                    "capacidad": new_capacity,
+                    "ubicacion": new_location,
+                    "estado": new_status,
+                    "pos_x": new_pos_x,
+                    "pos_y": new_pos_y
+                })
+            st.success(f"Mesa {new_table_number} agregada con éxito")
+            st.rerun()
+    
+    st.markdown("</div>", unsafe_allow_html=True)
@@ -0,0 +1,128 @@
+import heapq
+from bisect import bisect_right
+from collections import deque
+
+from seating import DEFAULT_TURN_MINUTES
+
+
+class WaitQueue:
+    # Lista de espera de clientes sin reserva. Cada tamaño de grupo tiene su
+    # propia cola en orden de llegada, así que el primer grupo que cabe en una
+    # mesa se encuentra mirando solo la cabeza de las colas de tamaño menor o
+    # igual a su capacidad. Las bajas solo quitan el grupo del diccionario y
+    # la cola lo descarta al llegar a la cabeza.
+    # Para cada mesa se guarda su estado y la hora (segundos) a la que queda
+    # libre: al instante si está libre, al terminar el turno esperado si está
+    # ocupada; las reservadas no se ofrecen. Un cambio de estado solo toca su
+    # mesa y marca la simulación como obsoleta. La simulación guarda la hora
+    # a la que se sentará cada grupo y solo se repite tras un cambio en la
+    # cola, las mesas o las duraciones, no por el paso del tiempo.
+
+    def __init__(self, turn_minutes=DEFAULT_TURN_MINUTES):
+        self._queues = {}
+        self._sizes = []
+        self._parties = {}
+        self._tables = {}
+        self._default_turn = turn_minutes * 60
+        self._turn_seconds = {}
+        self._estimates = None
+
+    def turn_seconds(self, comensales):
+        return self._turn_seconds.get(int(comensales), self._default_turn)
+
+    def set_turn_times(self, seconds_by_size):
+        # Duración esperada del turno por tamaño de grupo (segundos)
+        self._turn_seconds = {int(size): int(seconds) for size, seconds in seconds_by_size.items()}
+        self._estimates = None
+
+    def add(self, party_id, comensales, llegada):
+        comensales = int(comensales)
+        if comensales not in self._queues:
+            self._queues[comensales] = deque()
+            self._sizes = sorted(self._queues)
+        self._queues[comensales].append((int(llegada), int(party_id)))
+        self._parties[int(party_id)] = (comensales, int(llegada))
+        self._estimates = None
+
+    def remove(self, party_id):
+        if self._parties.pop(int(party_id), None) is not None:
+            self._estimates = None
+
+    def __len__(self):
+        return len(self._parties)
+
+    def set_table(self, numero, estado, at, capacidad=None, comensales=None):
+        # `comensales` es el grupo que se sienta, si se conoce; si no, se
+        # espera un turno como el de un grupo que llena la mesa
+        numero = int(numero)
+        current = self._tables.get(numero)
+        if capacidad is None:
+            if current is None:
+                return
+            capacidad = current[0]
+        capacidad = int(capacidad)
+
+        if comensales is None and current is not None and current[1] == estado and current[0] == capacidad:
+            return
+        if estado == "Libre":
+            free_at = int(at)
+        elif estado == "Ocupada":
+            free_at = int(at) + self.turn_seconds(comensales or capacidad)
+        else:
+            free_at = None
+        self._tables[numero] = (capacidad, estado, free_at)
+        self._estimates = None
+
+    def _head(self, comensales):
+        # Primer grupo vivo de la cola, descartando los ya retirados
+        queue = self._queues[comensales]
+        while queue and queue[0][1] not in self._parties:
+            queue.popleft()
+        return queue[0] if queue else None
+
+    def next_party(self, capacidad):
+        # Grupo que llegó antes entre los que caben en una mesa de `capacidad`
+        heads = [self._head(size) for size in self._sizes[:bisect_right(self._sizes, capacidad)]]
+        heads = [head for head in heads if head is not None]
+        return min(heads)[1] if heads else None
+
+    def estimates(self, now):
+        # Espera estimada en segundos por grupo (None si ninguna mesa le cabe):
+        # la hora simulada a la que se sienta menos `now`
+        now = int(now)
+        if self._estimates is None:
+            self._estimates = self._simulate(now)
+        return {party_id: None if seated_at is None else max(0, seated_at - now)
+                for party_id, seated_at in self._estimates.items()}
+
+    def _simulate(self, now):
+        # Simula la sala desde `now`: cada vez que una mesa queda libre se
+        # sienta en ella el grupo que llegó antes de entre los que caben, y la
+        # mesa vuelve a quedar libre al acabar su turno. Devuelve la hora
+        # (segundos) a la que se sienta cada grupo. O((grupos + mesas) log mesas).
+        pending = {size: [party_id for _, party_id in queue if party_id in self._parties]
+                   for size, queue in self._queues.items()}
+        positions = dict.fromkeys(pending, 0)
+        events = [(max(free_at, now), capacidad, numero)
+                  for numero, (capacidad, _, free_at) in self._tables.items() if free_at is not None]
+        heapq.heapify(events)
+
+        seated = dict.fromkeys(self._parties)
+        remaining = len(self._parties)
+        while events and remaining:
+            free_at, capacidad, numero = heapq.heappop(events)
+            best = None
+            for size in self._sizes[:bisect_right(self._sizes, capacidad)]:
+                if positions[size] < len(pending[size]):
+                    party_id = pending[size][positions[size]]
+                    if best is None or self._parties[party_id][1] < self._parties[best[1]][1]:
+                        best = (size, party_id)
+            if best is None:
+                # Ningún grupo en espera cabe en esta mesa
+                continue
+            size, party_id = best
+            positions[size] += 1
+            remaining -= 1
+            seated[party_id] = free_at
+            heapq.heappush(events, (free_at + self.turn_seconds(size), capacidad, numero))
+        return seated